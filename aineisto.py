@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Yhdistetyn aineiston tiivis muistiesitys
+========================================
+merged_data on alun perin sanakirja {jakso: {sarja: arvo}}, jossa jokaisella
+jaksolla toistuvat kaikkien sarjojen nimet ja puuttuvat arvot ovat None.
+MergedData tallentaa saman NumPy-matriisina (jaksot x sarjat), jossa NaN
+merkitsee puuttuvaa arvoa (kelpoisuusmaski = ~isnan), ja tarjoaa
+sanakirjamaiset rajapinnat:
+
+    merged.keys()                 -> jaksot aikajärjestyksessä
+    merged["2024M01"]["vuokraindeksi"]  -> arvo tai None
+    merged["2024M01"].items()     -> (sarja, arvo) -parit
+
+joten print_summary ja ennuste.get_latest_values toimivat sellaisenaan.
+"""
+
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+
+def period_sort_key(period: str):
+    """Jaksojen järjestys: kuukaudet ja neljännekset samalle aikajanalle"""
+    if 'M' in period:
+        return (int(period[:4]), int(period[5:7]), 0)
+    return (int(period[:4]), int(period[5]) * 3, 1)
+
+
+class RowView(Mapping):
+    """Yhden jakson arvot {sarja: arvo tai None} ilman kopiota"""
+
+    __slots__ = ("_data", "_row")
+
+    def __init__(self, data: "MergedData", row: int):
+        self._data = data
+        self._row = row
+
+    def __getitem__(self, name: str) -> Optional[float]:
+        value = self._data.values[self._row, self._data.name_index[name]]
+        return None if np.isnan(value) else float(value)
+
+    def __contains__(self, name) -> bool:
+        return name in self._data.name_index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data.names)
+
+    def __len__(self) -> int:
+        return len(self._data.names)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class SeriesView(Mapping):
+    """Sarjoittainen näkymä {sarja: {jakso: arvo}}, sarjat muodostetaan pyydettäessä"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: "MergedData"):
+        self._data = data
+
+    def __getitem__(self, name: str) -> Dict[str, float]:
+        return self._data.series(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data.names)
+
+    def __len__(self) -> int:
+        return len(self._data.names)
+
+
+class MergedData(Mapping):
+    """Jaksot x sarjat -matriisi (puuttuvat NaN) sanakirjarajapinnalla"""
+
+    __slots__ = ("periods", "names", "values", "period_index", "name_index")
+
+    def __init__(self, periods: List[str], names: List[str], values: np.ndarray):
+        self.periods = list(periods)
+        self.names = list(names)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.period_index = {p: i for i, p in enumerate(self.periods)}
+        self.name_index = {n: i for i, n in enumerate(self.names)}
+
+    @classmethod
+    def from_series(cls, data: Mapping) -> "MergedData":
+        """Muodosta sarjoista {sarja: {jakso: arvo}}"""
+        names = list(data.keys())
+        periods = set()
+        for series in data.values():
+            periods.update(series.keys())
+        periods = sorted(periods, key=period_sort_key)
+        period_index = {p: i for i, p in enumerate(periods)}
+
+        values = np.full((len(periods), len(names)), np.nan)
+        for col, series in enumerate(data.values()):
+            if series:
+                rows = np.fromiter((period_index[p] for p in series), dtype=np.int64,
+                                   count=len(series))
+                values[rows, col] = np.fromiter(series.values(), dtype=np.float64,
+                                                count=len(series))
+        return cls(periods, names, values)
+
+    @classmethod
+    def from_dict(cls, merged: Mapping) -> "MergedData":
+        """Muodosta JSON-muodosta {jakso: {sarja: arvo tai None}}"""
+        periods = sorted(merged.keys(), key=period_sort_key)
+        names = list(merged[periods[0]].keys()) if periods else []
+        values = np.array([[np.nan if merged[p].get(n) is None else merged[p][n]
+                            for n in names] for p in periods], dtype=np.float64)
+        return cls(periods, names, values.reshape(len(periods), len(names)))
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Kelpoisuusmaski (jaksot x sarjat)"""
+        return ~np.isnan(self.values)
+
+    def to_dict(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """JSON-vientiä varten alkuperäinen sanakirjamuoto"""
+        return {p: dict(self[p]) for p in self.periods}
+
+    def series(self, name: str) -> Dict[str, float]:
+        """Yhden sarjan kelvolliset arvot {jakso: arvo}"""
+        col = self.name_index[name]
+        rows = np.flatnonzero(~np.isnan(self.values[:, col]))
+        return dict(zip([self.periods[i] for i in rows], self.values[rows, col].tolist()))
+
+    def series_view(self) -> SeriesView:
+        return SeriesView(self)
+
+    def __getitem__(self, period: str) -> RowView:
+        return RowView(self, self.period_index[period])
+
+    def __contains__(self, period) -> bool:
+        return period in self.period_index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.periods)
+
+    def __len__(self) -> int:
+        return len(self.periods)
+
+    def __repr__(self):
+        return f"MergedData({len(self.periods)} jaksoa x {len(self.names)} sarjaa)"
+
+
+# =============================================================================
+# AIKAIKKUNAKYSELYT
+# =============================================================================
+def month_ordinal(period: str) -> int:
+    """Kuukauden järjestysnumero (vuosi * 12 + kuukausi - 1)"""
+    return int(period[:4]) * 12 + int(period[5:7]) - 1
+
+
+def ordinal_to_month(ordinal: int) -> str:
+    return f"{ordinal // 12}M{ordinal % 12 + 1:02d}"
+
+
+def period_months(period: str) -> range:
+    """Jakson kuukausien järjestysnumerot: 2024M03, 2024Q1 tai 2024"""
+    year = int(period[:4])
+    if 'M' in period:
+        start = year * 12 + int(period[5:7]) - 1
+        return range(start, start + 1)
+    if 'Q' in period:
+        start = year * 12 + (int(period[5]) - 1) * 3
+        return range(start, start + 3)
+    return range(year * 12, year * 12 + 12)
+
+
+def shift_period(period: str, n: int) -> str:
+    """Siirrä jaksoa n saman frekvenssin jaksoa eteen- tai taaksepäin"""
+    if 'M' in period:
+        return ordinal_to_month(month_ordinal(period) + n)
+    if 'Q' in period:
+        q = int(period[:4]) * 4 + int(period[5]) - 1 + n
+        return f"{q // 4}Q{q % 4 + 1}"
+    return str(int(period) + n)
+
+
+class AggregateIndex:
+    """
+    Etukäteen lasketut kumulatiiviset summat ja havaintomäärät sarjoittain
+
+    Minkä tahansa kuukausi-, neljännes- tai vuosi-ikkunan summa, keskiarvo
+    ja muutos saadaan kahden rivin erotuksena O(1) ajassa. Kyselyt
+    vektoroituvat kaikkien sarjojen yli, kun sarjaa ei anneta.
+
+    Keskiarvo, liukuva summa ja muutokset ovat NaN, jos ikkunasta puuttuu
+    kuukausia (esim. kesken oleva vuosi), jotta vertailut ovat vertailukelpoisia.
+    Osittaisen ikkunan kattavuus saadaan coverage-metodilla.
+    """
+
+    def __init__(self, merged: MergedData):
+        months = [p for p in merged.periods if 'M' in p]
+        self.names = merged.names
+        self.name_index = merged.name_index
+        self.first = month_ordinal(months[0]) if months else 0
+        n_months = month_ordinal(months[-1]) - self.first + 1 if months else 0
+
+        rows = np.array([month_ordinal(p) - self.first for p in months], dtype=np.int64)
+        values = np.full((n_months, len(self.names)), np.nan)
+        values[rows] = merged.values[[merged.period_index[p] for p in months]]
+        valid = ~np.isnan(values)
+
+        zero = np.zeros((1, len(self.names)))
+        self.sums = np.concatenate([zero, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+        self.counts = np.concatenate([zero, np.cumsum(valid, axis=0)])
+
+        # Viimeisin kelvollinen havainto / olemassa oleva jakso kuhunkin kuukauteen asti
+        idx = np.arange(n_months)[:, None]
+        self.last_valid = np.maximum.accumulate(np.where(valid, idx, -1), axis=0)
+        exists = np.zeros(n_months, dtype=bool)
+        exists[rows] = True
+        self.last_existing = np.maximum.accumulate(np.where(exists, np.arange(n_months), -1))
+        self.values = values
+
+    def _bounds(self, start: str, end: Optional[str] = None):
+        lo = period_months(start).start - self.first
+        hi = period_months(end or start).stop - self.first
+        n = len(self.values)
+        return min(max(lo, 0), n), min(max(hi, 0), n)
+
+    @staticmethod
+    def _window_months(start: str, end: Optional[str] = None) -> int:
+        """Ikkunan kuukausien määrä aineistosta riippumatta"""
+        return max(period_months(end or start).stop - period_months(start).start, 0)
+
+    def _cols(self, series):
+        if series is None:
+            return slice(None)
+        if isinstance(series, str):
+            return self.name_index[series]
+        return [self.name_index[s] for s in series]
+
+    def sum(self, start: str, end: Optional[str] = None, series=None):
+        """Ikkunan [start, end] summa (puuttuvat ohitetaan)"""
+        lo, hi = self._bounds(start, end)
+        cols = self._cols(series)
+        return self.sums[hi, cols] - self.sums[lo, cols]
+
+    def count(self, start: str, end: Optional[str] = None, series=None):
+        lo, hi = self._bounds(start, end)
+        cols = self._cols(series)
+        return self.counts[hi, cols] - self.counts[lo, cols]
+
+    def coverage(self, start: str, end: Optional[str] = None, series=None):
+        """Havaittujen kuukausien osuus ikkunan kuukausista (0..1)"""
+        months = self._window_months(start, end)
+        return (self.count(start, end, series) / max(months, 1))[()]
+
+    def mean(self, start: str, end: Optional[str] = None, series=None,
+             complete: bool = True):
+        """
+        Ikkunan keskiarvo
+
+        complete=True: NaN, jos ikkunasta puuttuu yksikin kuukausi.
+        complete=False: havaittujen kuukausien keskiarvo, NaN jos ei yhtään.
+        """
+        total, n = self.sum(start, end, series), self.count(start, end, series)
+        needed = self._window_months(start, end) if complete else 1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(n >= needed, total / np.maximum(n, 1), np.nan)[()]
+
+    def rolling_sum(self, end: str, months: int = 12, series=None):
+        """Liukuva summa end-kuukauteen päättyen, NaN jos ikkuna ei ole täysi"""
+        start = ordinal_to_month(period_months(end).stop - months)
+        total, n = self.sum(start, end, series), self.count(start, end, series)
+        return np.where(n >= months, total, np.nan)[()]
+
+    def change(self, period: str, lag: int = 1, series=None, pct: bool = True):
+        """Jakson keskiarvon muutos lag jaksoa aiemmasta, NaN jos kumpi tahansa on vajaa"""
+        current = self.mean(period, series=series)
+        previous = self.mean(shift_period(period, -lag), series=series)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return ((current / previous - 1) * 100 if pct else current - previous)[()]
+
+    def yoy(self, period: str, series=None):
+        """Vuosimuutos-% (sama jakso edellisenä vuonna)"""
+        lag = 12 if 'M' in period else 4 if 'Q' in period else 1
+        return self.change(period, lag, series)
+
+    def latest(self, as_of: Optional[str] = None, series=None):
+        """Viimeisin kelvollinen arvo as_of-kuukauteen (tai loppuun) mennessä"""
+        t = len(self.values) - 1 if as_of is None else self._bounds(as_of)[1] - 1
+        cols = self._cols(series)
+        if t < 0:
+            # as_of ennen ensimmäistä kuukautta (tai tyhjä aineisto)
+            return np.full(len(self.names), np.nan)[cols][()]
+        rows = self.last_valid[t, cols]
+        picked = self.values[rows, cols] if np.ndim(rows) == 0 else \
+            self.values[rows, np.arange(len(self.names))[cols]]
+        return np.where(np.asarray(rows) >= 0, picked, np.nan)[()]
+
+    def latest_month_in(self, period: str) -> Optional[str]:
+        """Jakson viimeisin aineistossa oleva kuukausi"""
+        lo, hi = self._bounds(period)
+        if hi <= lo or self.last_existing[hi - 1] < lo:
+            return None
+        return ordinal_to_month(int(self.last_existing[hi - 1]) + self.first)
+
+    def last_period(self, freq: str = "M") -> Optional[str]:
+        if not len(self.values):
+            return None
+        month = ordinal_to_month(len(self.values) - 1 + self.first)
+        if freq == "Q":
+            return f"{month[:4]}Q{(int(month[5:7]) - 1) // 3 + 1}"
+        return month[:4] if freq == "A" else month
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Sarjojen välinen analyysi - Liukuvat korrelaatiot ja johtavuus
+==============================================================
+Laskee yhdistetyn aineiston kaikille sarjapareille:
+- liukuvan korrelaation (ikkuna, oletus 24 kk)
+- ristikorrelaation viiveillä 0..max_lag (kumpi sarja johtaa ja kuinka paljon)
+- liukuvan vuosimuutoksen (YoY, %)
+
+Kaikki parit lasketaan kerralla matriisioperaatioilla. Tilaan tallennetaan
+parikohtaiset summat (n, Σx, Σx², Σxy), joten uusi kuukausi päivittää tuloksen
+O(parit) ajassa ilman koko historian uudelleenlaskentaa. Tila tallennetaan
+tiedostoon analyysi_tila.npz ja sitä jatketaan, kun uusia kuukausia tulee.
+
+Tallennettu tila etenee vain kuukauteen, jossa kaikkien sarjojen arvot ovat
+lopullisia (julkaistu eikä hajautuksen alustavaa loppua). Myöhemmät
+kuukaudet lisätään joka ajossa tilan kopioon.
+"""
+
+import copy
+import json
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import ennuste
+from aineisto import MergedData
+from sarjarekisteri import provisional_months
+
+CACHE_FILE = "analyysi_tila.npz"
+
+
+# =============================================================================
+# PARIKOHTAISET SUMMAT
+# =============================================================================
+def pair_sums(a: np.ndarray, b: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Parikohtaiset summat riveille a, b (t, n_sarjaa); NaN jättää parin pois
+
+    Palauttaa n, sa, sb, saa, sbb, sab muodossa (n_sarjaa, n_sarjaa), jossa
+    [i, j] koskee paria (a_i, b_j).
+    """
+    a, b = np.atleast_2d(a), np.atleast_2d(b)
+    ma, mb = ~np.isnan(a), ~np.isnan(b)
+    a0, b0 = np.where(ma, a, 0.0), np.where(mb, b, 0.0)
+    ma, mb = ma.astype(np.float64), mb.astype(np.float64)
+    return {
+        "n": ma.T @ mb,
+        "sa": a0.T @ mb,
+        "sb": ma.T @ b0,
+        "saa": (a0 * a0).T @ mb,
+        "sbb": ma.T @ (b0 * b0),
+        "sab": a0.T @ b0,
+    }
+
+
+def corr_from_sums(s: Dict[str, np.ndarray], min_periods: int = 3) -> np.ndarray:
+    """Pearsonin korrelaatio summista; liian vähän havaintoja -> NaN"""
+    n = s["n"]
+    cov = n * s["sab"] - s["sa"] * s["sb"]
+    var = (n * s["saa"] - s["sa"] ** 2) * (n * s["sbb"] - s["sb"] ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.sqrt(var)
+    corr[(n < min_periods) | ~(var > 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _add(target: Dict[str, np.ndarray], delta: Dict[str, np.ndarray], sign: float = 1.0):
+    for key, value in delta.items():
+        target[key] += sign * value
+
+
+def _zero_sums(n_series: int) -> Dict[str, np.ndarray]:
+    return {k: np.zeros((n_series, n_series)) for k in ("n", "sa", "sb", "saa", "sbb", "sab")}
+
+
+# =============================================================================
+# INKREMENTAALISET LASKURIT
+# =============================================================================
+class RollingCorrelation:
+    """Liukuva korrelaatio kaikille pareille, päivitys O(parit) per rivi"""
+
+    def __init__(self, n_series: int, window: int = 24, min_periods: Optional[int] = None):
+        self.window = window
+        self.min_periods = min_periods or window // 2
+        self.rows = deque(maxlen=window)
+        self.sums = _zero_sums(n_series)
+
+    def push(self, row: np.ndarray):
+        if len(self.rows) == self.window:
+            old = self.rows[0]
+            _add(self.sums, pair_sums(old, old), -1.0)
+        self.rows.append(row)
+        _add(self.sums, pair_sums(row, row))
+
+    def extend(self, rows: np.ndarray):
+        for row in rows:
+            self.push(row)
+
+    def correlation(self) -> np.ndarray:
+        return corr_from_sums(self.sums, self.min_periods)
+
+
+class LeadLagCorrelation:
+    """
+    Ristikorrelaatio viiveillä 0..max_lag koko historian yli
+
+    corr[k, i, j] = corr(x_i(t - k), x_j(t)), eli sarja i johtaa sarjaa j
+    k kuukaudella. Negatiiviset viiveet saadaan transpoosina.
+    """
+
+    def __init__(self, n_series: int, max_lag: int = 12, min_periods: int = 24):
+        self.max_lag = max_lag
+        self.min_periods = min_periods
+        self.rows = deque(maxlen=max_lag + 1)
+        self.sums = [_zero_sums(n_series) for _ in range(max_lag + 1)]
+
+    def push(self, row: np.ndarray):
+        self.rows.append(row)
+        for k in range(min(len(self.rows), self.max_lag + 1)):
+            _add(self.sums[k], pair_sums(self.rows[-1 - k], row))
+
+    def extend(self, rows: np.ndarray):
+        for row in rows:
+            self.push(row)
+
+    def correlations(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Palauta (viiveet -max_lag..max_lag, korrelaatiot (2L+1, n, n))"""
+        positive = np.stack([corr_from_sums(s, self.min_periods) for s in self.sums])
+        negative = positive[:0:-1].transpose(0, 2, 1)
+        lags = np.arange(-self.max_lag, self.max_lag + 1)
+        return lags, np.concatenate([negative, positive])
+
+    def best_lags(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Vahvimman (itseisarvo) korrelaation viive ja arvo jokaiselle parille"""
+        lags, corr = self.correlations()
+        filled = np.where(np.isnan(corr), -np.inf, np.abs(corr))
+        idx = filled.argmax(axis=0)
+        best = np.take_along_axis(corr, idx[None], axis=0)[0]
+        return lags[idx], best
+
+
+def yoy_change(matrix: np.ndarray, lag: int = 12) -> np.ndarray:
+    """Vuosimuutos-% riveittäin (t, n_sarjaa); ensimmäiset lag riviä NaN"""
+    out = np.full(matrix.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out[lag:] = (matrix[lag:] / matrix[:-lag] - 1) * 100
+    return out
+
+
+# =============================================================================
+# TILA JA VÄLIMUISTI
+# =============================================================================
+class AnalysisState:
+    """
+    Kaikkien parien analyysitila, jota jatketaan uusilla kuukausilla
+
+    Korrelaatiot lasketaan vuosimuutoksista (transform="yoy"), koska
+    indeksitasojen yhteinen trendi tuottaisi näennäisiä korrelaatioita.
+    """
+
+    def __init__(self, names: List[str], window: int = 24, max_lag: int = 12,
+                 transform: str = "yoy"):
+        self.names = list(names)
+        self.window = window
+        self.max_lag = max_lag
+        self.transform = transform
+        self.periods: List[str] = []
+        self.raw = deque(maxlen=12)
+        # Viimeisin kelvollinen vuosimuutos ja sen kuukausi sarjoittain
+        self.latest_yoy = np.full(len(names), np.nan)
+        self.yoy_periods: List[Optional[str]] = [None] * len(names)
+        self.rolling = RollingCorrelation(len(names), window)
+        self.lead_lag = LeadLagCorrelation(len(names), max_lag)
+
+    def extend(self, periods: List[str], rows: np.ndarray):
+        """Lisää uudet kuukaudet (rivit aikajärjestyksessä)"""
+        for period, row in zip(periods, rows):
+            row = np.asarray(row, dtype=np.float64)
+            if len(self.raw) == 12:
+                yoy = yoy_change(np.vstack([self.raw[0], row]), lag=1)[1]
+            else:
+                yoy = np.full(len(self.names), np.nan)
+            self.raw.append(row)
+            for col in np.flatnonzero(~np.isnan(yoy)):
+                self.latest_yoy[col] = yoy[col]
+                self.yoy_periods[col] = period
+
+            value = yoy if self.transform == "yoy" else row
+            if self.transform != "yoy" or not np.isnan(value).all():
+                self.rolling.push(value)
+                self.lead_lag.push(value)
+            self.periods.append(period)
+
+    def save(self, filename: str = CACHE_FILE):
+        arrays = {"raw": np.array(self.raw).reshape(-1, len(self.names)),
+                  "rolling_rows": np.array(self.rolling.rows).reshape(-1, len(self.names)),
+                  "lead_rows": np.array(self.lead_lag.rows).reshape(-1, len(self.names)),
+                  "latest_yoy": self.latest_yoy}
+        arrays.update({f"rolling_{k}": v for k, v in self.rolling.sums.items()})
+        for lag, sums in enumerate(self.lead_lag.sums):
+            arrays.update({f"lag{lag}_{k}": v for k, v in sums.items()})
+        meta = {"names": self.names, "periods": self.periods, "window": self.window,
+                "max_lag": self.max_lag, "transform": self.transform,
+                "yoy_periods": self.yoy_periods}
+        np.savez_compressed(filename, meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, filename: str = CACHE_FILE) -> Optional["AnalysisState"]:
+        try:
+            stored = np.load(filename)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        meta = json.loads(str(stored["meta"]))
+        state = cls(meta["names"], meta["window"], meta["max_lag"], meta["transform"])
+        state.periods = meta["periods"]
+        state.raw.extend(stored["raw"])
+        state.rolling.rows.extend(stored["rolling_rows"])
+        state.lead_lag.rows.extend(stored["lead_rows"])
+        state.latest_yoy = stored["latest_yoy"]
+        state.yoy_periods = meta.get("yoy_periods", state.yoy_periods)
+        state.rolling.sums = {k: stored[f"rolling_{k}"] for k in state.rolling.sums}
+        state.lead_lag.sums = [{k: stored[f"lag{lag}_{k}"] for k in sums}
+                               for lag, sums in enumerate(state.lead_lag.sums)]
+        return state
+
+
+def merged_matrix(data: dict) -> Tuple[List[str], List[str], np.ndarray]:
+    """Yhdistetty aineisto matriisiksi (kuukaudet x sarjat), puuttuvat NaN"""
+    merged = data.get('merged_data', {})
+    if not isinstance(merged, MergedData):
+        merged = MergedData.from_dict(merged)
+    rows = [i for i, p in enumerate(merged.periods) if 'M' in p]
+    return merged.names, [merged.periods[i] for i in rows], merged.values[rows]
+
+
+def final_rows(names: List[str], matrix: np.ndarray) -> int:
+    """Lopullisten kuukausien määrä: kaikilla sarjoilla julkaistu ja hajautuksessa lopullinen"""
+    valid = ~np.isnan(matrix)
+    ends = []
+    for col, name in enumerate(names):
+        rows = np.flatnonzero(valid[:, col])
+        if len(rows):
+            ends.append(rows[-1] + 1 - provisional_months(name))
+    return max(min(ends), 0) if ends else 0
+
+
+def update_analysis(data: dict, cache_file: str = CACHE_FILE, **kwargs) -> AnalysisState:
+    """
+    Jatka tallennettua analyysitilaa uusilla kuukausilla
+
+    Tila lasketaan alusta, jos sarjat tai asetukset (window, max_lag,
+    transform) ovat muuttuneet tai jo käsitellyt kuukaudet ovat
+    revisoituneet (vertailu viimeisiin 12 kuukauteen).
+    Tallennettu tila kattaa lopulliset kuukaudet; palautettu tila sisältää
+    lisäksi alustavat kuukaudet.
+    """
+    names, periods, matrix = merged_matrix(data)
+    final = final_rows(names, matrix)
+    state = AnalysisState.load(cache_file)
+    wanted = AnalysisState(names, **kwargs)
+    settings = lambda s: (s.window, s.max_lag, s.transform)
+
+    start = 0
+    if state is not None and state.names == names and settings(state) == settings(wanted) \
+            and state.periods and state.periods[-1] in periods:
+        start = periods.index(state.periods[-1]) + 1
+        stored = np.array(state.raw).reshape(-1, len(names))
+        observed = matrix[start - len(stored):start]
+        if len(stored) != len(observed) or not np.allclose(stored, observed, equal_nan=True):
+            state, start = None, 0
+    else:
+        state = None
+
+    if state is None:
+        state = wanted
+    if final > start:
+        state.extend(periods[start:final], matrix[start:final])
+        state.save(cache_file)
+    current = copy.deepcopy(state)
+    current.extend(periods[max(start, final):], matrix[max(start, final):])
+    return current
+
+
+def print_analysis(state: AnalysisState, top: int = 5):
+    names = state.names
+    iu = np.triu_indices(len(names), k=1)
+
+    print("\n" + "=" * 60)
+    print(f"LIUKUVA KORRELAATIO ({state.window} kk, {state.transform})")
+    print("=" * 60)
+    corr = state.rolling.correlation()[iu]
+    for idx in np.argsort(-np.nan_to_num(np.abs(corr), nan=-1))[:top]:
+        if not np.isnan(corr[idx]):
+            print(f"  {names[iu[0][idx]]} ~ {names[iu[1][idx]]}: {corr[idx]:+.2f}")
+
+    print("\n" + "=" * 60)
+    print("JOHTAVUUS (ristikorrelaatio)")
+    print("=" * 60)
+    lags, best = state.lead_lag.best_lags()
+    lags, best = lags[iu], best[iu]
+    for idx in np.argsort(-np.nan_to_num(np.abs(best), nan=-1))[:top]:
+        if np.isnan(best[idx]):
+            continue
+        i, j, lag = iu[0][idx], iu[1][idx], lags[idx]
+        leader, follower = (names[i], names[j]) if lag >= 0 else (names[j], names[i])
+        print(f"  {leader} johtaa {follower} {abs(lag)} kk (r={best[idx]:+.2f})")
+
+    print("\n" + "=" * 60)
+    print("VUOSIMUUTOS (sarjan viimeisin kuukausi)")
+    print("=" * 60)
+    for name, value, period in zip(names, state.latest_yoy, state.yoy_periods):
+        if not np.isnan(value):
+            print(f"  {name}: {value:+.1f}% ({period})")
+
+
+def main():
+    data = ennuste.load_data()
+    if not data:
+        return
+    state = update_analysis(data)
+    print_analysis(state)
+    return state
+
+
+if __name__ == "__main__":
+    main()
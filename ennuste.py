@@ -6,7 +6,7 @@ Ennustemoduuli - Extrapoloi tulevat kuukaudet
 import json
 import numpy as np
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -20,7 +20,8 @@ def load_data(filename: str = "asuminen_rakentaminen.json") -> dict:
         return {}
 
 
-def get_latest_values(data: dict, n_months: int = 12) -> Dict[str, List]:
+def get_latest_values(data: dict, n_months: int = 12,
+                      series: Optional[List[str]] = None) -> Dict[str, List]:
     merged = data.get('merged_data', {})
     
     sorted_periods = sorted(merged.keys(), key=lambda x: (
@@ -28,7 +29,7 @@ def get_latest_values(data: dict, n_months: int = 12) -> Dict[str, List]:
     ))
     
     result = {}
-    for series_key in merged[sorted_periods[0]].keys():
+    for series_key in series or merged[sorted_periods[0]].keys():
         values = []
         for period in sorted_periods:
             val = merged[period].get(series_key)
@@ -81,8 +82,8 @@ def generate_forecast_periods(last_period: str, steps: int = 6) -> List:
     return []
 
 
-def create_forecast(data: dict, months: int = 6) -> dict:
-    latest_values = get_latest_values(data, n_months=12)
+def create_forecast(data: dict, months: int = 6, series: Optional[List[str]] = None) -> dict:
+    latest_values = get_latest_values(data, n_months=12, series=series)
     
     if not latest_values:
         return {}
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Tilallinen Holt-ennuste - O(1) päivitys uudelle havainnolle
+===========================================================
+predict_next_months sovittaa Holtin tasoituksen joka ajossa uudelleen
+viimeisiin 36 arvoon, jolloin tulos riippuu myös ikkunan alkukohdasta.
+Tässä taso, trendi ja yhden askeleen ennustevirheiden tilastot tallennetaan
+sarjoittain tiedostoon ennusteet/holt_tila.json. Uusi havainto päivittää
+tilan yhdellä Holt-askeleella; koko historia sovitetaan uudelleen vain, jos
+jo käsitellyt arvot ovat revisoituneet.
+
+Kuukausiksi hajautettujen neljännes- ja vuosisarjojen viimeiset kuukaudet
+ovat alustavia (sarjarekisteri.provisional_months). Tallennettu tila
+etenee vain lopullisiin kuukausiin asti, ja alustava loppu ajetaan joka
+kerta tallennetun tilan kopioon, joten hajautuksen revisiot eivät
+käynnistä koko historian uudelleensovitusta.
+"""
+
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import ennuste
+from sarjarekisteri import provisional_months
+
+STATE_FILE = os.path.join("ennusteet", "holt_tila.json")
+
+# Revisiotarkistukseen säilytettävien viimeisten havaintojen määrä
+RECENT = 12
+
+
+def holt_step(level: float, trend: float, value: float,
+              alpha: float = 0.3, beta: float = 0.1) -> Tuple[float, float, float]:
+    """Yksi Holt-päivitys, palauttaa (taso, trendi, ennustevirhe)"""
+    error = value - (level + trend)
+    last_level = level
+    level = alpha * value + (1 - alpha) * (level + trend)
+    trend = beta * (level - last_level) + (1 - beta) * trend
+    return level, trend, error
+
+
+class HoltState:
+    """Yhden sarjan Holt-tila ja ennustevirheiden juokseva keskiarvo/varianssi"""
+
+    __slots__ = ("level", "trend", "n", "error_mean", "error_m2", "last_period", "recent")
+
+    def __init__(self, level: float, trend: float, n: int = 0, error_mean: float = 0.0,
+                 error_m2: float = 0.0, last_period: Optional[str] = None,
+                 recent: Optional[List[list]] = None):
+        self.level = level
+        self.trend = trend
+        self.n = n
+        self.error_mean = error_mean
+        self.error_m2 = error_m2
+        self.last_period = last_period
+        self.recent = recent or []
+
+    @classmethod
+    def fit(cls, observations: List[Tuple[str, float]], alpha: float = 0.3,
+            beta: float = 0.1) -> "HoltState":
+        """Sovitus koko historiaan (alustus kuten holt_exponential_smoothing)"""
+        values = [v for _, v in observations]
+        state = cls(level=values[0], trend=values[1] - values[0])
+        for period, value in observations:
+            state.step(period, value, alpha, beta)
+        return state
+
+    def step(self, period: str, value: float, alpha: float = 0.3, beta: float = 0.1):
+        self.level, self.trend, error = holt_step(self.level, self.trend, value, alpha, beta)
+        # Welfordin päivitys ennustevirheille
+        self.n += 1
+        delta = error - self.error_mean
+        self.error_mean += delta / self.n
+        self.error_m2 += delta * (error - self.error_mean)
+        self.last_period = period
+        self.recent.append([period, value])
+        del self.recent[:-RECENT]
+
+    def copy(self) -> "HoltState":
+        return HoltState(**dict(self.to_dict(), recent=[list(r) for r in self.recent]))
+
+    @property
+    def error_std(self) -> float:
+        return math.sqrt(self.error_m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def forecast(self, steps: int = 12) -> List[float]:
+        return [self.level + self.trend * h for h in range(1, steps + 1)]
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class HoltStateStore:
+    """Kaikkien sarjojen Holt-tilat, tallennus ennusteet/-kansioon"""
+
+    def __init__(self, filename: str = STATE_FILE, alpha: float = 0.3, beta: float = 0.1):
+        self.filename = filename
+        self.alpha = alpha
+        self.beta = beta
+        self.states: Dict[str, HoltState] = {}
+        # Tallennettu tila + alustavat kuukaudet (ei tallenneta)
+        self.current: Dict[str, HoltState] = {}
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if (stored.get("alpha"), stored.get("beta")) == (alpha, beta):
+            self.states = {name: HoltState(**s) for name, s in stored["series"].items()}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        with open(self.filename, 'w', encoding='utf-8') as f:
+            json.dump({"alpha": self.alpha, "beta": self.beta,
+                       "series": {n: s.to_dict() for n, s in self.states.items()}}, f)
+
+    def update(self, name: str, observations: List[Tuple[str, float]],
+               provisional: int = 0) -> str:
+        """
+        Päivitä sarjan tila havainnoilla (aikajärjestyksessä)
+
+        Havainnoiksi riittää loppupää, joka kattaa tallennetut RECENT arvoa ja
+        uudet havainnot. Jos tallennetut arvot ovat muuttuneet (revisio),
+        sovitetaan annettuihin havaintoihin - silloin anna koko historia.
+
+        Args:
+            provisional: Viimeiset havainnot, jotka voivat vielä muuttua; niitä
+                ei tallenneta tilaan vaan ne ajetaan current-tilaan
+
+        Returns:
+            Tallennetun tilan muutos: "uusi", "revisio", "päivitetty" tai "ennallaan"
+        """
+        final = observations[:len(observations) - provisional] if provisional else observations
+        status = self._update_final(name, final)
+        if name in self.states:
+            current = self.states[name].copy()
+            for period, value in observations[len(final):]:
+                current.step(period, value, self.alpha, self.beta)
+            self.current[name] = current
+        elif len(observations) >= 2:
+            self.current[name] = HoltState.fit(observations, self.alpha, self.beta)
+        return status
+
+    def _update_final(self, name: str, observations: List[Tuple[str, float]]) -> str:
+        if len(observations) < 2:
+            return "ennallaan"
+        state = self.states.get(name)
+        if state is None:
+            self.states[name] = HoltState.fit(observations, self.alpha, self.beta)
+            return "uusi"
+
+        # Uudet havainnot ovat viimeisen käsitellyn jakson jälkeen
+        new_from = len(observations)
+        while new_from > 0 and observations[new_from - 1][0] != state.last_period:
+            new_from -= 1
+
+        tail = dict(observations[max(new_from - len(state.recent), 0):new_from])
+        if new_from == 0 or any(p in tail and tail[p] != v for p, v in state.recent):
+            self.states[name] = HoltState.fit(observations, self.alpha, self.beta)
+            return "revisio"
+
+        for period, value in observations[new_from:]:
+            state.step(period, value, self.alpha, self.beta)
+        return "päivitetty" if new_from < len(observations) else "ennallaan"
+
+    def forecast(self, name: str, steps: int = 12) -> List[float]:
+        return self.current.get(name, self.states.get(name)).forecast(steps)
+
+
+def main(months: int = 12):
+    print("=" * 50)
+    print("HOLT-ENNUSTEET (tallennettu tila)")
+    print("=" * 50)
+
+    data = ennuste.load_data()
+    if not data:
+        return
+
+    store = HoltStateStore()
+    forecasts = {}
+    for name, observations in ennuste.get_latest_values(data, n_months=len(data['merged_data'])).items():
+        status = store.update(name, observations, provisional_months(name))
+        if name not in store.current:
+            continue
+        state = store.current[name]
+        print(f"  {name}: {status}, taso {state.level:.1f}, trendi {state.trend:+.3f}/kk, "
+              f"virheen hajonta {state.error_std:.2f}")
+        periods = ennuste.generate_forecast_periods(state.last_period, months)
+        for period, value in zip(periods, state.forecast(months)):
+            forecasts.setdefault(period, {})[name] = round(value, 2)
+    store.save()
+
+    ennuste.print_forecast_summary(forecasts)
+    return forecasts
+
+
+if __name__ == "__main__":
+    main()
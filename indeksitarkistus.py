@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Indeksitarkistukset sopimuskannalle - Virtaava eräajo
+=====================================================
+Laskee indeksitarkistuksen jokaiselle sopimukselle:
+
+    tarkistettu_summa = summa * indeksi(tarkistusajankohta) / indeksi(perusajankohta)
+
+Sopimukset luetaan CSV- tai Parquet-tiedostosta paloittain generaattoriputkessa
+(luku -> laskenta -> kirjoitus), joten muistinkäyttö ei riipu tiedoston koosta.
+Indeksiarvot haetaan esiladatusta taulukosta, jota indeksoidaan suoraan
+kuukauden järjestysnumerolla, ja ajankohdat puretaan tavuina ilman
+merkkijonokäsittelyä riveittäin.
+
+Ajankohdat muodossa 2024M03 tai 2024-03.
+"""
+
+import os
+import sys
+import numpy as np
+from typing import Iterator, Optional
+
+import ennuste
+from aineisto import MergedData, month_ordinal
+
+CHUNK_ROWS = 1_000_000
+
+AMOUNT_COL = "summa"
+BASE_COL = "perusajankohta"
+REVISION_COL = "tarkistusajankohta"
+
+
+class IndexTable:
+    """Indeksisarja taulukkona, jota indeksoidaan kuukauden järjestysnumerolla"""
+
+    def __init__(self, first_period: str, values: np.ndarray):
+        self.first = month_ordinal(first_period)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    @classmethod
+    def from_merged(cls, data: dict, series: str = "rakennuskustannusindeksi") -> "IndexTable":
+        """Yhdistetystä aineistosta (asuminen_rakentaminen.json)"""
+        merged = data['merged_data']
+        if not isinstance(merged, MergedData):
+            merged = MergedData.from_dict(merged)
+        months = [p for p in merged.periods if 'M' in p]
+        first = month_ordinal(months[0])
+        values = np.full(month_ordinal(months[-1]) - first + 1, np.nan)
+        col = merged.name_index[series]
+        for p in months:
+            values[month_ordinal(p) - first] = merged.values[merged.period_index[p], col]
+        return cls(months[0], values)
+
+    @classmethod
+    def from_cube(cls, cube, **codes: str) -> "IndexTable":
+        """
+        Osaindeksistä tai perusvuodesta (rki_hierarkia.RkiCube)
+
+        Antamatta jätetyt luokitukset kiinnitetään ainoaan koodiinsa tai
+        kokonaisindeksiin.
+        """
+        fixed = dict(codes)
+        for dim in cube.dims:
+            if dim in fixed:
+                continue
+            roots = [c for c, p in cube.parents.get(dim, {}).items() if p is None]
+            options = cube.codes[dim] if len(cube.codes[dim]) == 1 else roots
+            if len(options) != 1:
+                raise ValueError(f"Anna koodi luokitukselle {dim}: {cube.codes[dim][:10]}")
+            fixed[dim] = options[0]
+        for dim, code in fixed.items():
+            if dim not in cube.codes:
+                raise ValueError(f"Tuntematon luokitus {dim}: {cube.dims}")
+            if code not in cube.codes[dim]:
+                raise ValueError(f"Anna koodi luokitukselle {dim}: {cube.codes[dim][:10]}")
+        return cls(cube.periods[0], cube.series(**fixed))
+
+    def lookup(self, ordinals: np.ndarray) -> np.ndarray:
+        """Indeksiarvot järjestysnumeroille; tuntematon kuukausi -> NaN"""
+        idx = ordinals - self.first
+        valid = (idx >= 0) & (idx < len(self.values))
+        out = np.full(len(idx), np.nan)
+        out[valid] = self.values[idx[valid]]
+        return out
+
+
+def parse_months(periods) -> np.ndarray:
+    """Muunna ajankohdat (2024M03 / 2024-03) järjestysnumeroiksi vektoroidusti"""
+    raw = np.asarray(periods, dtype='S7')
+    digits = raw.view(np.uint8).reshape(len(raw), 7).astype(np.int64) - ord('0')
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    ordinals = year * 12 + month - 1
+    ordinals[(month < 1) | (month > 12)] = -1
+    return ordinals
+
+
+# =============================================================================
+# GENERAATTORIPUTKI
+# =============================================================================
+def _pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        return None
+
+
+def read_chunks(filename: str, chunk_rows: int = CHUNK_ROWS) -> Iterator:
+    """
+    Lue sopimukset paloittain (pandas.DataFrame)
+
+    Parquet vaatii pyarrow-paketin; CSV luetaan pyarrow'n virtaavalla
+    lukijalla, jos se on asennettu, muuten pandas.read_csv-paloina. CSV:n
+    summa luetaan aina liukulukuna ja muut sarakkeet tekstinä.
+    """
+    pa = _pyarrow()
+    if filename.endswith(".parquet"):
+        if pa is None:
+            raise ImportError("Parquet-tiedostot vaativat pyarrow-paketin: pip install pyarrow")
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(filename).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif pa is not None:
+        import csv
+        import pyarrow.csv as pacsv
+        # Tyypit kiinnitetään koko tiedostolle: ensimmäisestä lohkosta päätelty
+        # tyyppi kaatuisi myöhempiin poikkeaviin arvoihin. Läpi kulkevat sarakkeet tekstinä.
+        with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+            header = next(csv.reader(f))
+        types = {name: pa.string() for name in header}
+        types[AMOUNT_COL] = pa.float64()
+        reader = pacsv.open_csv(
+            filename,
+            read_options=pacsv.ReadOptions(block_size=chunk_rows * 64),
+            convert_options=pacsv.ConvertOptions(column_types=types))
+        for batch in reader:
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+        header = pd.read_csv(filename, nrows=0).columns
+        dtype = {name: str for name in header}
+        dtype[AMOUNT_COL] = np.float64
+        yield from pd.read_csv(filename, chunksize=chunk_rows, dtype=dtype, keep_default_na=False,
+                               na_values={AMOUNT_COL: [""]})
+
+
+def adjust_chunks(chunks: Iterator, table: IndexTable) -> Iterator:
+    """Laske indeksitarkistus jokaiselle palalle"""
+    for df in chunks:
+        base = table.lookup(parse_months(df[BASE_COL].to_numpy()))
+        revision = table.lookup(parse_months(df[REVISION_COL].to_numpy()))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            factor = revision / base
+        df["perusindeksi"] = base
+        df["tarkistusindeksi"] = revision
+        df["muutoskerroin"] = factor
+        df["tarkistettu_summa"] = df[AMOUNT_COL].to_numpy(dtype=np.float64) * factor
+        yield df
+
+
+def write_chunks(chunks: Iterator, filename: str) -> int:
+    """
+    Kirjoita palat tiedostoon, palauta rivimäärä
+
+    Skeema kiinnitetään ensimmäisestä palasta; myöhemmät palat muunnetaan
+    siihen (esim. kokonaan tyhjä sarake palassa tai pandasin erilainen tyyppipäättely).
+    """
+    rows = 0
+    pa = _pyarrow()
+    if pa is not None:
+        import pyarrow.csv as pacsv
+        import pyarrow.parquet as pq
+        parquet = filename.endswith(".parquet")
+        writer, schema = None, None
+        try:
+            for df in chunks:
+                if schema is None:
+                    batch = pa.Table.from_pandas(df, preserve_index=False)
+                    # Ensimmäisen palan tyhjille sarakkeille kiinteä tyyppi
+                    schema = pa.schema([
+                        f.with_type(pa.float64() if f.name == AMOUNT_COL else pa.string())
+                        if pa.types.is_null(f.type) else f
+                        for f in batch.schema.remove_metadata()])
+                    writer = (pq.ParquetWriter if parquet else pacsv.CSVWriter)(filename, schema)
+                else:
+                    batch = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                writer.write_table(batch.cast(schema))
+                rows += len(df)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif filename.endswith(".parquet"):
+        raise ImportError("Parquet-tiedostot vaativat pyarrow-paketin: pip install pyarrow")
+    else:
+        for i, df in enumerate(chunks):
+            df.to_csv(filename, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(df)
+    return rows
+
+
+def adjust_file(input_file: str, output_file: str, table: IndexTable,
+                chunk_rows: int = CHUNK_ROWS) -> int:
+    """Aja koko putki: luku -> tarkistus -> kirjoitus"""
+    return write_chunks(adjust_chunks(read_chunks(input_file, chunk_rows), table), output_file)
+
+
+def main(input_file: str, output_file: str, series: str = "rakennuskustannusindeksi",
+         cube_codes: Optional[dict] = None):
+    import time
+
+    print("=" * 60)
+    print("INDEKSITARKISTUKSET")
+    print("=" * 60)
+
+    if cube_codes:
+        from rki_hierarkia import RkiCube
+        table = IndexTable.from_cube(RkiCube.load(), **cube_codes)
+    else:
+        data = ennuste.load_data()
+        if not data:
+            return
+        table = IndexTable.from_merged(data, series)
+
+    start = time.time()
+    rows = adjust_file(input_file, output_file, table)
+    elapsed = time.time() - start
+    print(f"Sopimuksia: {rows}, aika {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} riviä/s)")
+    print(f"Tulokset: {output_file} ({os.path.getsize(output_file) / 1e6:.1f} MB)")
+    return rows
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Käyttö: python indeksitarkistus.py sopimukset.csv tulos.csv [sarja | Koodi=arvo ...]")
+        sys.exit(1)
+    extra = sys.argv[3:]
+    codes = dict(a.split("=", 1) for a in extra if "=" in a)
+    names = [a for a in extra if "=" not in a]
+    main(sys.argv[1], sys.argv[2], *names[:1], cube_codes=codes or None)
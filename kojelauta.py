@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Interaktiivinen HTML-kojelauta
+==============================
+Piirtää yhdistetyn aineiston, ennusteet ja (jos saatavilla) kaikki
+rakennuskustannusindeksin osaindeksit selaimessa zoomattavaksi kuvaajaksi.
+
+Pitkät ja lukuisat sarjat harvennetaan palvelinpuolella
+Largest-Triangle-Three-Buckets (LTTB) -algoritmilla. Aikajana jaetaan
+zoomaustasoittain paloihin (taso z = 2^z palaa), ja jokainen pala harvennetaan
+omaan pistebudjettiinsa, joten piirrettävien pisteiden määrä pysyy samana
+zoomaustasosta riippumatta. Valmiit palat tallennetaan välimuistiin muistiin
+ja levylle (aineiston tiivisteen mukaan).
+
+    python kojelauta.py              -> kojelauta.html (tasot upotettuina)
+    python kojelauta.py --serve 8050 -> paikallinen palvelin, palat pyydettäessä
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+import numpy as np
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import ennuste
+from aineisto import MergedData, month_ordinal
+
+OUTPUT_FILE = "kojelauta.html"
+FORECAST_FILE = "ennusteet.json"
+CUBE_FILE = "rki_hierarkia.npz"
+CACHE_DIR = ".kojelauta_valimuisti"
+
+# Pisteitä yhteensä yhdessä palassa (kaikki sarjat); sarjakohtainen määrä rajataan välille
+POINT_BUDGET = 200_000
+MIN_POINTS = 16
+MAX_POINTS = 512
+
+# Staattiseen tiedostoon upotettavat zoomaustasot
+STATIC_LEVELS = 2
+
+
+# =============================================================================
+# LTTB
+# =============================================================================
+def lttb_indices(x: np.ndarray, Y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets kaikille sarjoille kerralla
+
+    Ämpärit ovat yhteiset, joten silmukka kulkee ämpäreittäin (n_out kierrosta)
+    ja jokainen kierros on vektoroitu sarjojen yli. Puuttuvat arvot (NaN)
+    valitaan vain, jos ämpärissä ei ole kelvollisia pisteitä.
+
+    Args:
+        x: (n,) aika-akseli
+        Y: (n_sarjaa, n) arvot
+        n_out: Valittavien pisteiden määrä sarjaa kohden
+
+    Returns:
+        (n_sarjaa, n_out) valitut sarakeindeksit nousevassa järjestyksessä
+    """
+    n_series, n = Y.shape
+    if n <= n_out or n_out < 3:
+        return np.broadcast_to(np.arange(n), (n_series, n)).copy()
+
+    rows = np.arange(n_series)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty((n_series, n_out), dtype=np.int64)
+    idx[:, 0], idx[:, -1] = 0, n - 1
+    prev = np.zeros(n_series, dtype=np.int64)
+
+    with np.errstate(invalid='ignore'):
+        for b in range(n_out - 2):
+            lo, hi = edges[b], edges[b + 1]
+            if b + 2 < len(edges):
+                nlo, nhi = edges[b + 1], edges[b + 2]
+                cx = x[nlo:nhi].mean()
+                window = Y[:, nlo:nhi]
+                valid = ~np.isnan(window)
+                cy = np.where(valid, window, 0.0).sum(axis=1) / valid.sum(axis=1)
+            else:
+                cx, cy = x[-1], Y[:, -1]
+
+            ax, ay = x[prev], Y[rows, prev]
+            bucket = Y[:, lo:hi]
+            area = np.abs((ax - cx)[:, None] * (bucket - ay[:, None])
+                          - (ax[:, None] - x[lo:hi]) * (cy - ay)[:, None])
+            area = np.where(np.isnan(area), np.where(np.isnan(bucket), -2.0, -1.0), area)
+            prev = lo + np.argmax(area, axis=1)
+            idx[:, b + 1] = prev
+    return idx
+
+
+# =============================================================================
+# PALAT JA VÄLIMUISTI
+# =============================================================================
+class TileCache:
+    """
+    LTTB-harvennetut palat zoomaustasoittain
+
+    Taso z jakaa aikajanan 2^z palaan; palat lasketaan pyydettäessä ja
+    säilytetään LRU-välimuistissa sekä levyllä hakemistossa
+    CACHE_DIR/<tiiviste>/. Tiiviste kattaa aineiston ja harvennusasetukset;
+    muiden tiivisteiden hakemistot poistetaan vanhentuneina.
+    """
+
+    def __init__(self, x: np.ndarray, Y: np.ndarray, cache_dir: Optional[str] = CACHE_DIR,
+                 max_tiles: int = 256):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.Y = np.asarray(Y, dtype=np.float64)
+        n_series, n = self.Y.shape
+        self.points = int(np.clip(POINT_BUDGET // max(n_series, 1), MIN_POINTS, MAX_POINTS))
+        self.max_level = max(math.ceil(math.log2(n / self.points)), 0) if n > self.points else 0
+        self.max_tiles = max_tiles
+        self._memory: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+        # ThreadingHTTPServer kutsuu get-metodia rinnakkain
+        self._lock = threading.Lock()
+
+        settings = f"{self.Y.shape}:{self.points}:{POINT_BUDGET}:{MIN_POINTS}:{MAX_POINTS}"
+        digest = hashlib.sha1(settings.encode() + self.x.tobytes() + self.Y.tobytes()).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir, digest) if cache_dir else None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Vanhan aineiston tai eri asetuksilla lasketut palat pois
+            for entry in os.listdir(cache_dir):
+                stale = os.path.join(cache_dir, entry)
+                if entry != digest and os.path.isdir(stale):
+                    shutil.rmtree(stale, ignore_errors=True)
+
+    def bounds(self, level: int, tile: int) -> Tuple[int, int]:
+        """Palan sarakeväli; palat limittyvät yhdellä pisteellä, jotta viivat jatkuvat"""
+        n, parts = len(self.x), 1 << level
+        return n * tile // parts, min(n * (tile + 1) // parts + 1, n)
+
+    def compute(self, level: int, tile: int) -> dict:
+        lo, hi = self.bounds(level, tile)
+        x, Y = self.x[lo:hi], self.Y[:, lo:hi]
+        idx = lttb_indices(x, Y, self.points)
+        values = np.round(np.take_along_axis(Y, idx, axis=1), 3)
+        # Sarjat, joilla ei ole palassa yhtään arvoa, jätetään pois (null)
+        empty = np.isnan(values).all(axis=1)
+        return {
+            "z": level, "t": tile,
+            "x": [None if e else x[i].astype(int).tolist() for i, e in zip(idx, empty)],
+            "y": [None if e else [None if np.isnan(v) else v for v in row.tolist()]
+                  for row, e in zip(values, empty)],
+        }
+
+    def get(self, level: int, tile: int) -> str:
+        """Pala JSON-merkkijonona"""
+        if not (0 <= level <= self.max_level and 0 <= tile < (1 << level)):
+            raise KeyError((level, tile))
+        key = (level, tile)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = os.path.join(self.cache_dir, f"{level}_{tile}.json") if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        else:
+            text = json.dumps(self.compute(level, tile), separators=(",", ":"))
+            if path:
+                # Väliaikaistiedoston kautta, jotta rinnakkainen lukija ei näe puolikasta palaa
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp, path)
+
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.max_tiles:
+                self._memory.popitem(last=False)
+        return text
+
+
+# =============================================================================
+# AINEISTO
+# =============================================================================
+def load_series(data: dict, forecast_file: str = FORECAST_FILE,
+                cube_file: str = CUBE_FILE) -> Tuple[np.ndarray, List[str], List[str], np.ndarray]:
+    """
+    Kokoa kaikki kuukausisarjat yhteiselle aika-akselille
+
+    Returns:
+        x: Kuukausien järjestysnumerot
+        names: Sarjojen tunnisteet
+        groups: Sarjaryhmä (aineisto, ennuste tai rki)
+        Y: (n_sarjaa, n_kk) arvot, puuttuvat NaN
+    """
+    merged = data['merged_data']
+    if not isinstance(merged, MergedData):
+        merged = MergedData.from_dict(merged)
+    months = [p for p in merged.periods if 'M' in p]
+    rows = [merged.period_index[p] for p in months]
+
+    blocks: List[Tuple[List[int], List[str], str, np.ndarray]] = [
+        ([month_ordinal(p) for p in months], list(merged.names), "aineisto",
+         merged.values[rows].T)
+    ]
+
+    if os.path.exists(forecast_file):
+        with open(forecast_file, 'r', encoding='utf-8') as f:
+            forecasts = json.load(f).get("forecasts", {})
+        periods = sorted((p for p in forecasts if 'M' in p), key=month_ordinal)
+        names = sorted({s for p in periods for s in forecasts[p]})
+        values = np.array([[forecasts[p].get(s, np.nan) for p in periods] for s in names],
+                          dtype=np.float64).reshape(len(names), len(periods))
+        blocks.append(([month_ordinal(p) for p in periods], [f"{s} (ennuste)" for s in names],
+                       "ennuste", values))
+
+    if os.path.exists(cube_file):
+        from rki_hierarkia import RkiCube
+        cube = RkiCube.load(cube_file)
+        labels, matrix = cube.matrix()
+        blocks.append(([month_ordinal(p) for p in cube.periods],
+                       ["rki " + "/".join(codes) for codes in labels], "rki", matrix))
+
+    first = min(b[0][0] for b in blocks if b[0])
+    last = max(b[0][-1] for b in blocks if b[0])
+    x = np.arange(first, last + 1)
+    Y = np.full((sum(len(b[1]) for b in blocks), len(x)), np.nan)
+    names, groups, row = [], [], 0
+    for ordinals, block_names, group, values in blocks:
+        cols = np.asarray(ordinals, dtype=np.int64) - first
+        Y[row:row + len(block_names), cols] = values
+        names += block_names
+        groups += [group] * len(block_names)
+        row += len(block_names)
+    return x, names, groups, Y
+
+
+# =============================================================================
+# HTML
+# =============================================================================
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="fi">
+<head>
+<meta charset="utf-8">
+<title>Asuminen ja rakentaminen - kojelauta</title>
+<style>
+  body { font-family: sans-serif; margin: 0; display: flex; height: 100vh; }
+  #side { width: 280px; padding: 10px; overflow-y: auto; border-right: 1px solid #ddd; font-size: 13px; }
+  #main { flex: 1; position: relative; }
+  canvas { width: 100%; height: 100%; display: block; }
+  #tip { position: absolute; background: #fff; border: 1px solid #999; padding: 4px 6px;
+         font-size: 12px; pointer-events: none; display: none; white-space: pre; }
+  .item { cursor: pointer; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+  .item.off { opacity: 0.3; }
+  input { width: 100%; box-sizing: border-box; margin-bottom: 6px; }
+</style>
+</head>
+<body>
+<div id="side">
+  <b>Asuminen ja rakentaminen</b><br>
+  <small>Rulla: zoomaus, veto: siirto, tuplaklikkaus: palautus</small>
+  <input id="filter" placeholder="Suodata sarjoja (regex)">
+  <div id="count"></div>
+  <div id="legend"></div>
+</div>
+<div id="main"><canvas id="chart"></canvas><div id="tip"></div></div>
+<script>
+const META = __META__;
+const TILES = __TILES__;
+const SERVER = __SERVER__;
+const canvas = document.getElementById("chart"), ctx = canvas.getContext("2d");
+const tip = document.getElementById("tip");
+const N = META.names.length, X0 = META.x0, X1 = META.x1;
+const visible = new Array(N).fill(true);
+let view = [X0, X1], highlight = null, pending = {};
+const PAD = {l: 60, r: 20, t: 20, b: 40};
+
+function color(i) {
+  const g = META.groups[i];
+  if (g === "rki") return "hsla(" + (i * 47 % 360) + ",50%,45%,";
+  return "hsla(" + (i * 137.5 % 360) + ",70%," + (g === "ennuste" ? "60%," : "40%,");
+}
+function monthLabel(o) { return Math.floor(o / 12) + "M" + String(o % 12 + 1).padStart(2, "0"); }
+
+function tile(z, t) {
+  const key = z + "/" + t;
+  if (TILES[key]) return TILES[key];
+  if (SERVER && !pending[key]) {
+    pending[key] = true;
+    fetch("tile/" + key).then(r => r.json()).then(d => { TILES[key] = d; draw(); });
+  }
+  return null;
+}
+function level() {
+  const z = Math.ceil(Math.log2((X1 - X0 + 1) / (view[1] - view[0] + 1)));
+  return Math.max(0, Math.min(META.max_level, z));
+}
+function visibleTiles() {
+  // Pyydetty taso; puuttuvat palat korvataan karkeammalla tasolla
+  const out = [];
+  for (let z = level(); z >= 0; z--) {
+    const parts = 1 << z, span = (X1 - X0 + 1) / parts;
+    const t0 = Math.max(0, Math.floor((view[0] - X0) / span));
+    const t1 = Math.min(parts - 1, Math.floor((view[1] - X0) / span));
+    const got = [];
+    for (let t = t0; t <= t1; t++) { const d = tile(z, t); if (d) got.push(d); }
+    if (got.length === t1 - t0 + 1 || z === 0) return got.length ? got : out;
+    if (!out.length) out.push(...got);
+  }
+  return out;
+}
+
+function draw() {
+  const w = canvas.width = canvas.clientWidth * devicePixelRatio;
+  const h = canvas.height = canvas.clientHeight * devicePixelRatio;
+  ctx.setTransform(devicePixelRatio, 0, 0, devicePixelRatio, 0, 0);
+  const W = canvas.clientWidth, H = canvas.clientHeight;
+  ctx.clearRect(0, 0, W, H);
+  const tiles = visibleTiles();
+  let lo = Infinity, hi = -Infinity;
+  for (const d of tiles) for (let i = 0; i < N; i++) {
+    if (!visible[i] || !d.x[i]) continue;
+    d.x[i].forEach((x, k) => { const y = d.y[i][k];
+      if (y !== null && x >= view[0] && x <= view[1]) { lo = Math.min(lo, y); hi = Math.max(hi, y); } });
+  }
+  if (lo > hi) { lo = 0; hi = 1; }
+  const m = (hi - lo) * 0.05 || 1; lo -= m; hi += m;
+  const sx = x => PAD.l + (x - view[0]) / Math.max(view[1] - view[0], 1) * (W - PAD.l - PAD.r);
+  const sy = y => H - PAD.b - (y - lo) / (hi - lo) * (H - PAD.t - PAD.b);
+  canvas._scale = {sx, sy, W};
+
+  ctx.strokeStyle = "#eee"; ctx.fillStyle = "#444"; ctx.font = "11px sans-serif"; ctx.lineWidth = 1;
+  for (let k = 0; k <= 5; k++) {
+    const y = lo + (hi - lo) * k / 5;
+    ctx.beginPath(); ctx.moveTo(PAD.l, sy(y)); ctx.lineTo(W - PAD.r, sy(y)); ctx.stroke();
+    ctx.fillText(y.toFixed(1), 5, sy(y) + 4);
+  }
+  const step = Math.max(1, Math.ceil((view[1] - view[0]) / 12 / 10)) * 12;
+  for (let x = Math.ceil(view[0] / step) * step; x <= view[1]; x += step) {
+    ctx.beginPath(); ctx.moveTo(sx(x), PAD.t); ctx.lineTo(sx(x), H - PAD.b); ctx.stroke();
+    ctx.fillText(step >= 12 ? String(Math.floor(x / 12)) : monthLabel(x), sx(x) - 12, H - PAD.b + 15);
+  }
+
+  const many = N > 50;
+  ctx.save(); ctx.beginPath(); ctx.rect(PAD.l, PAD.t, W - PAD.l - PAD.r, H - PAD.t - PAD.b); ctx.clip();
+  const order = [...Array(N).keys()].filter(i => visible[i] && i !== highlight);
+  if (highlight !== null && visible[highlight]) order.push(highlight);
+  for (const i of order) {
+    const strong = i === highlight || !many;
+    ctx.strokeStyle = color(i) + (strong ? "1)" : "0.25)");
+    ctx.lineWidth = i === highlight ? 2.5 : strong ? 1.5 : 0.7;
+    ctx.setLineDash(META.groups[i] === "ennuste" ? [5, 3] : []);
+    ctx.beginPath();
+    for (const d of tiles) {
+      if (!d.x[i]) continue;
+      let pen = false;
+      d.x[i].forEach((x, k) => { const y = d.y[i][k];
+        if (y === null) { pen = false; return; }
+        pen ? ctx.lineTo(sx(x), sy(y)) : ctx.moveTo(sx(x), sy(y)); pen = true; });
+    }
+    ctx.stroke();
+  }
+  ctx.restore();
+}
+
+function buildLegend() {
+  const re = (() => { try { return new RegExp(document.getElementById("filter").value, "i"); }
+                      catch (e) { return /.*/; } })();
+  const legend = document.getElementById("legend"); legend.innerHTML = "";
+  let shown = 0;
+  META.names.forEach((name, i) => {
+    visible[i] = re.test(name + " " + META.labels[i]);
+    if (!visible[i]) return;
+    shown++;
+    if (shown > 300) return;
+    const div = document.createElement("div");
+    div.className = "item"; div.title = META.labels[i];
+    div.innerHTML = '<span style="color:' + color(i) + '1)">&#9632;</span> ' + name;
+    div.onmouseenter = () => { highlight = i; draw(); };
+    div.onmouseleave = () => { highlight = null; draw(); };
+    div.onclick = () => { visible[i] = !visible[i]; div.classList.toggle("off"); draw(); };
+    legend.appendChild(div);
+  });
+  document.getElementById("count").textContent = shown + " / " + N + " sarjaa";
+  draw();
+}
+
+canvas.addEventListener("wheel", e => {
+  e.preventDefault();
+  const {sx} = canvas._scale, W = canvas.clientWidth;
+  const frac = (e.offsetX - PAD.l) / (W - PAD.l - PAD.r);
+  const at = view[0] + frac * (view[1] - view[0]);
+  const f = e.deltaY > 0 ? 1.25 : 0.8;
+  let a = at - (at - view[0]) * f, b = at + (view[1] - at) * f;
+  if (b - a < 6) return;
+  view = [Math.max(X0, a), Math.min(X1, b)]; draw();
+}, {passive: false});
+let drag = null;
+canvas.addEventListener("mousedown", e => { drag = {x: e.offsetX, view: view.slice()}; });
+window.addEventListener("mouseup", () => { drag = null; });
+canvas.addEventListener("mousemove", e => {
+  const W = canvas.clientWidth, per = (view[1] - view[0]) / (W - PAD.l - PAD.r);
+  if (drag) {
+    let shift = (drag.x - e.offsetX) * per;
+    shift = Math.max(X0 - drag.view[0], Math.min(X1 - drag.view[1], shift));
+    view = [drag.view[0] + shift, drag.view[1] + shift]; draw(); return;
+  }
+  const x = Math.round(view[0] + (e.offsetX - PAD.l) * per);
+  const lines = [];
+  for (const d of visibleTiles()) for (let i = 0; i < N && lines.length < 12; i++) {
+    if (!visible[i] || !d.x[i] || (highlight !== null && i !== highlight)) continue;
+    const k = d.x[i].indexOf(x);
+    if (k >= 0 && d.y[i][k] !== null) lines.push(META.names[i] + ": " + d.y[i][k]);
+  }
+  tip.style.display = lines.length ? "block" : "none";
+  tip.textContent = monthLabel(x) + "\\n" + lines.join("\\n");
+  tip.style.left = (e.offsetX + 15) + "px"; tip.style.top = (e.offsetY + 10) + "px";
+});
+canvas.addEventListener("mouseleave", () => { tip.style.display = "none"; });
+canvas.addEventListener("dblclick", () => { view = [X0, X1]; draw(); });
+document.getElementById("filter").addEventListener("input", buildLegend);
+window.addEventListener("resize", draw);
+buildLegend();
+</script>
+</body>
+</html>
+"""
+
+
+def render_html(cache: TileCache, names: List[str], labels: List[str], groups: List[str],
+                levels: int, server: bool = False) -> str:
+    """Muodosta HTML; tasot 0..levels-1 upotetaan valmiiksi"""
+    meta = {
+        "names": names, "labels": labels, "groups": groups,
+        "x0": int(cache.x[0]), "x1": int(cache.x[-1]), "max_level": cache.max_level,
+    }
+    tiles = ",".join(f'"{z}/{t}":{cache.get(z, t)}'
+                     for z in range(min(levels, cache.max_level + 1)) for t in range(1 << z))
+    return (HTML_TEMPLATE
+            .replace("__META__", json.dumps(meta, ensure_ascii=False))
+            .replace("__TILES__", "{" + tiles + "}")
+            .replace("__SERVER__", "true" if server else "false"))
+
+
+def build(data: dict) -> Tuple[TileCache, List[str], List[str], List[str]]:
+    x, names, groups, Y = load_series(data)
+    descriptions = data.get('metadata', {}).get('series', {})
+    labels = [descriptions.get(n.replace(" (ennuste)", ""), n) for n in names]
+    return TileCache(x, Y), names, labels, groups
+
+
+def serve(cache: TileCache, html: str, port: int = 8050):
+    """Paikallinen palvelin: / -> kojelauta, /tile/<z>/<t> -> pala JSON:na"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            try:
+                if parts == [""]:
+                    body, ctype = html.encode("utf-8"), "text/html; charset=utf-8"
+                elif len(parts) == 3 and parts[0] == "tile":
+                    body = cache.get(int(parts[1]), int(parts[2])).encode("utf-8")
+                    ctype = "application/json"
+                else:
+                    raise KeyError(self.path)
+            except (KeyError, ValueError):
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Kojelauta: http://127.0.0.1:{port}/  (Ctrl+C lopettaa)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(port: Optional[int] = None):
+    print("=" * 60)
+    print("INTERAKTIIVINEN KOJELAUTA")
+    print("=" * 60)
+
+    data = ennuste.load_data()
+    if not data:
+        return
+    cache, names, labels, groups = build(data)
+    counts: Dict[str, int] = {}
+    for g in groups:
+        counts[g] = counts.get(g, 0) + 1
+    print(f"Sarjoja: {len(names)} ({', '.join(f'{g} {n}' for g, n in counts.items())}), "
+          f"{len(cache.x)} kk")
+    print(f"Pisteitä per sarja ja pala: {cache.points}, zoomaustasoja: {cache.max_level + 1}")
+
+    if port is not None:
+        serve(cache, render_html(cache, names, labels, groups, levels=1, server=True), port)
+        return cache
+
+    html = render_html(cache, names, labels, groups, levels=STATIC_LEVELS)
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"Tallennettu: {OUTPUT_FILE} ({len(html) / 1e6:.1f} MB)")
+    return cache
+
+
+if __name__ == "__main__":
+    if "--serve" in sys.argv:
+        rest = sys.argv[sys.argv.index("--serve") + 1:]
+        main(int(rest[0]) if rest else 8050)
+    else:
+        main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Kustannusnousun Monte Carlo -simulointi indeksisidonnaisille urakoille
+======================================================================
+Yhden Holt-ennustepolun sijaan simuloidaan kymmeniä tuhansia
+rakennuskustannusindeksin tulevia polkuja ja sovelletaan ne projektien
+kassavirta-aikatauluihin. Tuloksena saadaan jokaiselle projektille
+kustannusnousun jakauma (keskiarvo, hajonta, 5/50/95 % -kvantiilit).
+
+Malli: kuukausittainen log-muutos ~ N(mu, sigma), jossa mu tulee Holtin
+trendistä ja sigma historiallisten kuukausimuutosten hajonnasta.
+
+Laskenta on matriisitulo (projektit x kuukaudet) @ (kuukaudet x polut)
+projektipaloittain; palat voidaan jakaa prosesseille jaetun muistin kautta.
+
+Kassavirtatiedosto (CSV): projekti,kuukausi,summa
+    kuukausi = 1..H kuukautta viimeisimmän indeksiarvon jälkeen
+    summa    = maksuerä viimeisimmän indeksiarvon hintatasossa (EUR)
+"""
+
+import csv
+import os
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import ennuste
+from holt_tila import HoltState
+from rinnakkaisennuste import attach_array, share_array
+
+STATS = ("mean", "std", "p5", "p50", "p95")
+QUANTILES = (5, 50, 95)
+
+# Projekteja per pala: pala x polut -matriisi pysyy muutamassa kymmenessä megatavussa
+CHUNK_PROJECTS = 128
+
+
+def fit_model(values: List[float], window: int = 36) -> Tuple[float, float, float]:
+    """
+    Sovita simulointimalli indeksisarjaan
+
+    Returns:
+        level: Holtin taso (trendin suhteuttamiseen; polut alkavat viimeisestä havainnosta)
+        mu: Kuukausittainen log-muutoksen odotusarvo Holtin trendistä
+        sigma: Kuukausittaisten log-muutosten hajonta viimeisen window kk:n ajalta
+    """
+    recent = values[-window:]
+    state = HoltState.fit(list(enumerate(recent)))
+    mu = float(np.log1p(state.trend / state.level))
+    sigma = float(np.std(np.diff(np.log(recent)), ddof=1))
+    return state.level, mu, sigma
+
+
+def simulate_paths(start: float, mu: float, sigma: float, horizon: int, n_paths: int,
+                   seed: Optional[int] = None) -> np.ndarray:
+    """
+    Simuloi indeksipolut (n_paths, horizon)
+
+    start on sama indeksiarvo, johon kustannusnousu suhteutetaan
+    (simulate_portfolion base_index), jotta nollamuutos antaa nollanousun.
+    """
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((n_paths, horizon))
+    shocks *= sigma
+    shocks += mu
+    np.cumsum(shocks, axis=1, out=shocks)
+    return start * np.exp(shocks)
+
+
+def _escalation_stats(cash_flows: np.ndarray, ratios_t: np.ndarray) -> np.ndarray:
+    """Kustannusnousun tilastot projekteittain: (n_projektit, len(STATS))"""
+    escalation = cash_flows @ ratios_t  # (projektit, polut)
+    out = np.empty((len(cash_flows), len(STATS)))
+    out[:, 0] = escalation.mean(axis=1)
+    out[:, 1] = escalation.std(axis=1)
+    out[:, 2:] = np.percentile(escalation, QUANTILES, axis=1).T
+    return out
+
+
+def _stats_chunk(cf_spec: tuple, ratio_spec: tuple, out_spec: tuple, start: int, stop: int) -> int:
+    """Työprosessi: projektit start:stop jaetusta muistista"""
+    shm_cf, cash_flows = attach_array(cf_spec)
+    shm_r, ratios_t = attach_array(ratio_spec)
+    shm_out, out = attach_array(out_spec)
+    try:
+        for s in range(start, stop, CHUNK_PROJECTS):
+            e = min(s + CHUNK_PROJECTS, stop)
+            out[s:e] = _escalation_stats(cash_flows[s:e], ratios_t)
+    finally:
+        del cash_flows, ratios_t, out
+        for shm in (shm_cf, shm_r, shm_out):
+            shm.close()
+    return stop - start
+
+
+def simulate_portfolio(cash_flows: np.ndarray, paths: np.ndarray, base_index: float,
+                       workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sovella indeksipolut projektien kassavirtoihin
+
+    Args:
+        cash_flows: (n_projektit, horizon) maksuerät lähtöhintatasossa
+        paths: (n_polut, horizon) simuloidut indeksiarvot
+        base_index: Lähtöhintatason indeksiarvo
+        workers: Prosessien määrä (1 = samassa prosessissa)
+
+    Returns:
+        stats: (n_projektit, len(STATS)) kustannusnousu euroina
+        portfolio: (n_polut,) koko salkun kustannusnousu poluittain
+    """
+    horizon = cash_flows.shape[1]
+    ratios_t = np.ascontiguousarray((paths[:, :horizon] / base_index - 1.0).T)
+    portfolio = cash_flows.sum(axis=0) @ ratios_t
+    n_projects = len(cash_flows)
+
+    if workers <= 1 or n_projects <= CHUNK_PROJECTS:
+        stats = np.empty((n_projects, len(STATS)))
+        for s in range(0, n_projects, CHUNK_PROJECTS):
+            stats[s:s + CHUNK_PROJECTS] = _escalation_stats(cash_flows[s:s + CHUNK_PROJECTS], ratios_t)
+        return stats, portfolio
+
+    shm_cf, cf_spec = share_array(np.ascontiguousarray(cash_flows, dtype=np.float64))
+    shm_r, ratio_spec = share_array(ratios_t)
+    shm_out, out_spec = share_array(np.empty((n_projects, len(STATS))))
+    step = -(-n_projects // workers)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_stats_chunk, cf_spec, ratio_spec, out_spec,
+                                   s, min(s + step, n_projects))
+                       for s in range(0, n_projects, step)]
+            for future in futures:
+                future.result()
+        stats = np.ndarray((n_projects, len(STATS)), buffer=shm_out.buf).copy()
+    finally:
+        for shm in (shm_cf, shm_r, shm_out):
+            shm.close()
+            shm.unlink()
+    return stats, portfolio
+
+
+def load_cash_flows(filename: str) -> Tuple[List[str], np.ndarray]:
+    """Lue kassavirrat CSV:stä (projekti,kuukausi,summa) matriisiksi"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        rows = [r for r in csv.DictReader(f)]
+    ids = list(dict.fromkeys(r['projekti'] for r in rows))
+    index = {p: i for i, p in enumerate(ids)}
+    project = np.array([index[r['projekti']] for r in rows], dtype=np.int64)
+    month = np.array([int(r['kuukausi']) for r in rows], dtype=np.int64)
+    amount = np.array([float(r['summa']) for r in rows])
+    if (month < 1).any():
+        bad = sorted({r['kuukausi'] for r, m in zip(rows, month) if m < 1})
+        raise ValueError(f"Kuukauden on oltava 1 tai suurempi: {', '.join(bad[:10])}")
+
+    matrix = np.zeros((len(ids), month.max()))
+    np.add.at(matrix, (project, month - 1), amount)
+    return ids, matrix
+
+
+def export_stats(ids: List[str], cash_flows: np.ndarray, stats: np.ndarray,
+                 filename: str = "kustannusriski.csv"):
+    base = cash_flows.sum(axis=1)
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["projekti", "kustannus"] + [f"nousu_{s}" for s in STATS] + ["nousu_p95_pct"])
+        for pid, b, row in zip(ids, base, stats):
+            pct = row[4] / b * 100 if b else 0.0
+            writer.writerow([pid, round(b, 2)] + [round(v, 2) for v in row] + [round(pct, 2)])
+    print(f"\nTulokset tallennettu: {filename}")
+
+
+def main(cash_flow_file: str, n_paths: int = 50_000, series: str = "rakennuskustannusindeksi"):
+    print("=" * 60)
+    print("KUSTANNUSNOUSUN MONTE CARLO -SIMULOINTI")
+    print("=" * 60)
+
+    data = ennuste.load_data()
+    if not data:
+        return
+    values = [v for _, v in ennuste.get_latest_values(data, n_months=36, series=[series])[series]]
+    level, mu, sigma = fit_model(values)
+    print(f"Malli: taso {level:.1f}, trendi {np.expm1(mu) * 100:+.2f} %/kk, "
+          f"hajonta {sigma * 100:.2f} %/kk")
+
+    ids, cash_flows = load_cash_flows(cash_flow_file)
+    # Maksuerät ovat viimeisimmän indeksiarvon hintatasossa: polut alkavat siitä
+    base_index = values[-1]
+    paths = simulate_paths(base_index, mu, sigma, cash_flows.shape[1], n_paths)
+    stats, portfolio = simulate_portfolio(cash_flows, paths, base_index,
+                                          workers=os.cpu_count() or 1)
+
+    total = cash_flows.sum()
+    p5, p50, p95 = np.percentile(portfolio, QUANTILES)
+    print(f"\nProjekteja: {len(ids)}, polkuja: {n_paths}, horisontti {cash_flows.shape[1]} kk")
+    print(f"Salkun kustannus: {total:,.0f} EUR")
+    print(f"Kustannusnousu: mediaani {p50:,.0f} EUR ({p50 / total * 100:+.2f} %), "
+          f"90 % väli {p5:,.0f} .. {p95:,.0f} EUR")
+    export_stats(ids, cash_flows, stats)
+    return stats, portfolio
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Käyttö: python kustannusriski.py kassavirrat.csv [polkujen_määrä]")
+        sys.exit(1)
+    main(sys.argv[1], *(int(a) for a in sys.argv[2:3]))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Ajoputki - Skriptit riippuvuusgraafina, muuttumattomat vaiheet ohitetaan
+========================================================================
+Vaiheet ja niiden riippuvuudet:
+    haku (asuminen_rakentaminen.py) -> ennuste (ennuste.py)
+                                    -> visualisointi (visualisoi_data.py)
+    rki_ennuste (rakennuskustannusindeksi.py)
+
+Jokaisen vaiheen syötteistä (lähdekoodi, edellisten vaiheiden tulostiedostot
+ja StatFin-taulukoiden päivitysajat) lasketaan tiiviste. Vaihe ajetaan vain,
+jos tiiviste on muuttunut tai tulostiedostot puuttuvat/ovat muuttuneet.
+Tila tallennetaan tiedostoon .putki_tila.json.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from graphlib import TopologicalSorter
+from typing import Callable, Dict, List, Optional
+
+from asuminen_rakentaminen import get_tables_updated
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(ROOT, ".putki_tila.json")
+
+
+def _registry_tables() -> List[str]:
+    from sarjarekisteri import SERIES
+    return sorted({spec.table for spec in SERIES})
+
+
+def statfin_fingerprint(tables: List[str]) -> Optional[str]:
+    """Taulukoiden päivitysajat yhtenä merkkijonona, None jos haku epäonnistui"""
+    updated = get_tables_updated(tables)
+    if len(updated) != len(tables):
+        return None
+    return json.dumps(updated, sort_keys=True)
+
+
+@dataclass
+class Stage:
+    """Yksi ajoputken vaihe"""
+    name: str
+    script: str
+    inputs: List[str]
+    outputs: List[str]
+    depends: List[str] = field(default_factory=list)
+    # Ulkoisen syötteen sormenjälki (esim. StatFin-päivitysajat)
+    probe: Optional[Callable[[], Optional[str]]] = None
+
+
+STAGES: List[Stage] = [
+    Stage(
+        name="haku",
+        script="asuminen_rakentaminen.py",
+        inputs=["asuminen_rakentaminen.py", "sarjarekisteri.py", "pxweb.py", "hajautus.py",
+                "aineisto.py"],
+        outputs=["asuminen_rakentaminen.json"],
+        probe=lambda: statfin_fingerprint(_registry_tables()),
+    ),
+    Stage(
+        name="ennuste",
+        script="ennuste.py",
+        inputs=["ennuste.py", "asuminen_rakentaminen.json"],
+        outputs=["ennusteet.json"],
+        depends=["haku"],
+    ),
+    Stage(
+        name="visualisointi",
+        script="visualisoi_data.py",
+        inputs=["visualisoi_data.py", "asuminen_rakentaminen.json"],
+        outputs=["asuminen_rakentaminen.png"],
+        depends=["haku"],
+    ),
+    Stage(
+        name="kojelauta",
+        script="kojelauta.py",
+        inputs=["kojelauta.py", "aineisto.py", "ennuste.py", "rki_hierarkia.py",
+                "asuminen_rakentaminen.json", "ennusteet.json", "rki_hierarkia.npz"],
+        outputs=["kojelauta.html"],
+        depends=["haku", "ennuste"],
+    ),
+    Stage(
+        name="rki_ennuste",
+        script="rakennuskustannusindeksi.py",
+        inputs=["rakennuskustannusindeksi.py"],
+        outputs=["rakennuskustannusindeksi_ennuste.json", "rakennuskustannusindeksi_ennuste.png"],
+        probe=lambda: statfin_fingerprint(["rki/statfin_rki_pxt_13g8.px"]),
+    ),
+]
+
+
+# =============================================================================
+# TIIVISTEET
+# =============================================================================
+class FileHasher:
+    """Tiedostotiivisteet välimuistilla: sisältö luetaan vain, jos mtime/koko muuttui"""
+
+    def __init__(self, cache: Optional[dict] = None):
+        self.cache = cache or {}
+
+    def __call__(self, path: str) -> Optional[str]:
+        full = os.path.join(ROOT, path)
+        try:
+            st = os.stat(full)
+        except FileNotFoundError:
+            return None
+        cached = self.cache.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(full, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        digest = h.hexdigest()
+        self.cache[path] = [st.st_mtime_ns, st.st_size, digest]
+        return digest
+
+
+def stage_input_hash(stage: Stage, hasher: FileHasher) -> Optional[str]:
+    """Vaiheen syötteiden tiiviste, None jos ulkoista syötettä ei saatu tarkistettua"""
+    h = hashlib.sha256(stage.name.encode())
+    for path in stage.inputs:
+        h.update(f"{path}:{hasher(path) or '-'}\n".encode())
+    if stage.probe is not None:
+        fingerprint = stage.probe()
+        if fingerprint is None:
+            return None
+        h.update(fingerprint.encode())
+    return h.hexdigest()
+
+
+# =============================================================================
+# AJO
+# =============================================================================
+def load_state() -> dict:
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"stages": {}, "files": {}}
+
+
+def save_state(state: dict):
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+
+def _selected(targets: Optional[List[str]]) -> List[Stage]:
+    """Valitut vaiheet ja niiden edeltäjät topologisessa järjestyksessä"""
+    by_name = {s.name: s for s in STAGES}
+    wanted = set(targets or by_name)
+    pending = list(wanted)
+    while pending:
+        for dep in by_name[pending.pop()].depends:
+            if dep not in wanted:
+                wanted.add(dep)
+                pending.append(dep)
+    order = TopologicalSorter({s.name: s.depends for s in STAGES}).static_order()
+    return [by_name[n] for n in order if n in wanted]
+
+
+def run_pipeline(targets: Optional[List[str]] = None, force: bool = False) -> Dict[str, str]:
+    """
+    Aja putki ja ohita vaiheet, joiden syötteet eivät ole muuttuneet
+
+    Returns:
+        {vaihe: "ajettu" | "ohitettu" | "epäonnistui" | "ei ajettu"}
+    """
+    state = load_state()
+    hasher = FileHasher(state.get("files"))
+    results: Dict[str, str] = {}
+
+    for stage in _selected(targets):
+        if any(results.get(dep) in ("epäonnistui", "ei ajettu") for dep in stage.depends):
+            results[stage.name] = "ei ajettu"
+            continue
+
+        input_hash = stage_input_hash(stage, hasher)
+        previous = state["stages"].get(stage.name, {})
+        outputs_intact = all(
+            hasher(path) is not None and hasher(path) == previous.get("outputs", {}).get(path)
+            for path in stage.outputs
+        )
+        if not force and input_hash is not None and input_hash == previous.get("inputs") \
+                and outputs_intact:
+            results[stage.name] = "ohitettu"
+            print(f"  {stage.name}: ohitettu (ei muutoksia)")
+            continue
+
+        print(f"  {stage.name}: ajetaan {stage.script}...")
+        start = time.time()
+        proc = subprocess.run([sys.executable, stage.script], cwd=ROOT)
+        if proc.returncode != 0:
+            results[stage.name] = "epäonnistui"
+            print(f"  {stage.name}: virhe (paluukoodi {proc.returncode})")
+            continue
+
+        state["stages"][stage.name] = {
+            "inputs": input_hash,
+            "outputs": {path: hasher(path) for path in stage.outputs},
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        results[stage.name] = "ajettu"
+        print(f"  {stage.name}: valmis ({time.time() - start:.1f}s)")
+
+    state["files"] = hasher.cache
+    save_state(state)
+    return results
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Aja asumisen ja rakentamisen ajoputki")
+    parser.add_argument("stages", nargs="*", help="Ajettavat vaiheet (oletus: kaikki)")
+    parser.add_argument("--force", action="store_true", help="Aja kaikki vaiheet uudelleen")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("AJOPUTKI")
+    print("=" * 60)
+    start = time.time()
+    results = run_pipeline(args.stages or None, force=args.force)
+    print(f"\nValmis {time.time() - start:.3f}s: " +
+          ", ".join(f"{k}={v}" for k, v in results.items()))
+    return 0 if "epäonnistui" not in results.values() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
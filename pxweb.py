@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+PxWeb-vastausten dekoodaus NumPy-taulukoiksi
+============================================
+JSON-muotoinen vastaus toistaa koko avaintuplen jokaiselle solulle. Tiiviimmät
+muodot JSON-stat2 ja CSV puretaan tässä suoraan NumPy-taulukoiksi:
+- JSON-stat2: arvolista + ulottuvuuksien indeksit -> taulukko muodossa `size`
+- CSV: selitesarakkeet + arvosarakkeet -> 2D-taulukko
+
+Puuttuvat arvot ('.', '..' jne.) muunnetaan NaN:ksi vektoroidulla maskilla.
+"""
+
+import csv
+import io
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+from asuminen_rakentaminen import fetch_response, get_table_metadata
+
+# PxWebin puuttuvan tiedon merkinnät
+MISSING_MARKERS = ('.', '..', '...', '....', '-', '')
+
+
+class PxTable:
+    """Dekoodattu taulukko: ulottuvuudet ja arvot NumPy-taulukkona"""
+
+    def __init__(self, dims: List[str], codes: Dict[str, List[str]],
+                 values: np.ndarray, labels: Optional[Dict[str, List[str]]] = None,
+                 time_dim: Optional[str] = None):
+        self.dims = dims
+        self.codes = codes
+        self.values = values
+        self.labels = labels or codes
+        self.time_dim = time_dim
+
+    def __repr__(self):
+        shape = " x ".join(f"{d}={len(self.codes[d])}" for d in self.dims)
+        return f"PxTable({shape})"
+
+    def select(self, **fixed: str) -> np.ndarray:
+        """Rajaa ulottuvuudet koodeilla, esim. select(Tiedot="pisteluku")"""
+        index = tuple(
+            self.codes[d].index(fixed[d]) if d in fixed else slice(None)
+            for d in self.dims
+        )
+        return self.values[index]
+
+    def to_series(self, **fixed: str) -> dict:
+        """
+        Palauta aikasarja muodossa {aika: arvo}
+
+        Muut kuin aikaulottuvuudet rajataan annetuilla koodeilla; yhden arvon
+        ulottuvuudet rajautuvat automaattisesti.
+        """
+        time_dim = self.time_dim or self.dims[0]
+        for d in self.dims:
+            if d != time_dim and d not in fixed and len(self.codes[d]) == 1:
+                fixed[d] = self.codes[d][0]
+        values = self.select(**fixed)
+        if values.ndim != 1:
+            raise ValueError(f"Rajaamattomia ulottuvuuksia: {self}")
+        valid = ~np.isnan(values)
+        times = np.asarray(self.codes[time_dim])
+        return dict(zip(times[valid].tolist(), values[valid].tolist()))
+
+
+def decode_values(cells) -> np.ndarray:
+    """Muunna merkkijonotaulukko liukuluvuiksi, puuttuvat merkinnät NaN:ksi"""
+    cells = np.asarray(cells, dtype=str)
+    missing = np.isin(cells, MISSING_MARKERS)
+    out = np.full(cells.shape, np.nan)
+    out[~missing] = cells[~missing].astype(np.float64)
+    return out
+
+
+def decode_json_stat2(payload: dict) -> PxTable:
+    """Pura JSON-stat2-vastaus PxTable-olioksi"""
+    dims = list(payload['id'])
+    sizes = list(payload['size'])
+
+    codes, labels = {}, {}
+    for dim in dims:
+        category = payload['dimension'][dim]['category']
+        index = category.get('index')
+        if index is None:
+            dim_codes = list(category.get('label', {}).keys())
+        elif isinstance(index, dict):
+            dim_codes = sorted(index, key=index.get)
+        else:
+            dim_codes = list(index)
+        codes[dim] = dim_codes
+        dim_labels = category.get('label', {})
+        labels[dim] = [dim_labels.get(c, c) for c in dim_codes]
+
+    raw = payload.get('value', [])
+    n_cells = int(np.prod(sizes)) if sizes else 0
+    if isinstance(raw, dict):
+        # Harva muoto: {"indeksi": arvo}
+        values = np.full(n_cells, np.nan)
+        if raw:
+            idx = np.fromiter((int(k) for k in raw), dtype=np.int64, count=len(raw))
+            values[idx] = np.array(list(raw.values()), dtype=np.float64)
+    else:
+        # null -> NaN suoraan float-muunnoksessa
+        values = np.array(raw, dtype=np.float64)
+
+    time_dims = payload.get('role', {}).get('time') or []
+    return PxTable(dims, codes, values.reshape(sizes), labels,
+                   time_dims[0] if time_dims else None)
+
+
+def decode_csv(text: str, n_label_cols: Optional[int] = None,
+               dim_names: Optional[Iterable[str]] = None):
+    """
+    Pura PxWebin CSV-vastaus
+
+    Arvosarakkeita ei päätellä sisällöstä, koska koodisarakkeet (esim.
+    "2015" tai "01") näyttävät luvuilta. Selitesarakkeet annetaan joko
+    suoraan määränä tai ulottuvuuksien niminä taulukon metatiedoista:
+    selitesarakkeita ovat otsikkorivin alun sarakkeet, joiden otsikko on
+    ulottuvuuden koodi tai teksti.
+
+    Args:
+        text: CSV-teksti (otsikkorivi + datarivit)
+        n_label_cols: Selitesarakkeiden määrä vasemmalla
+        dim_names: Ulottuvuuksien koodit ja/tai tekstit (get_table_metadata)
+
+    Returns:
+        row_labels: Lista selitetupleja riveittäin
+        columns: Arvosarakkeiden otsikot
+        values: Arvot (n_rivit, n_arvosarakkeet), puuttuvat NaN
+    """
+    rows = list(csv.reader(io.StringIO(text.lstrip('\ufeff'))))
+    rows = [r for r in rows if r]
+    header, body = rows[0], rows[1:]
+
+    if n_label_cols is None:
+        if dim_names is None:
+            raise ValueError("Anna n_label_cols tai dim_names (taulukon ulottuvuudet)")
+        names = set(dim_names)
+        n_label_cols = 0
+        while n_label_cols < len(header) and header[n_label_cols] in names:
+            n_label_cols += 1
+
+    if not body:
+        return [], header[n_label_cols:], np.empty((0, len(header) - n_label_cols))
+    cells = np.array(body, dtype=str)
+    row_labels = [tuple(r) for r in cells[:, :n_label_cols].tolist()]
+    return row_labels, header[n_label_cols:], decode_values(cells[:, n_label_cols:])
+
+
+def fetch_table(table_path: str, query: dict, response_format: str = "json-stat2"):
+    """
+    Hae taulukko tiiviissä muodossa ja dekoodaa NumPy-taulukoiksi
+
+    Returns:
+        json-stat2: PxTable tai None
+        csv: (row_labels, columns, values) tai None
+    """
+    query = dict(query, response={"format": response_format})
+    response = fetch_response(table_path, query)
+    if response is None:
+        return None
+    if response_format == "csv":
+        variables = get_table_metadata(table_path)
+        if not variables:
+            print("    Virhe: metatietoja ei saatu, CSV:n sarakkeita ei voi tulkita")
+            return None
+        names = [v['code'] for v in variables] + [v.get('text', v['code']) for v in variables]
+        return decode_csv(response.content.decode('utf-8-sig'), dim_names=names)
+    return decode_json_stat2(response.json())
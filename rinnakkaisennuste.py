@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Rinnakkainen ennusteajo - Tuhansien sarjojen ennusteet prosessipoolissa
+=======================================================================
+Sarjamatriisi (sarjat x ajankohdat) jaetaan rivipaloihin, jotka lasketaan
+prosessipoolissa. Syöte ja tulos välitetään jaetun muistin kautta, joten
+työprosesseille ei picklata kopioita datasta - vain lohkon rajat.
+
+Menetelmät (samat kuin yksittäisissä skripteissä, vektoroituna):
+- holt:   rakennuskustannusindeksi.predict_next_months (36 kk ikkuna)
+- linear: ennuste.linear_forecast (12 kk lineaarinen regressio)
+- blend:  ennuste.create_forecast (lineaarinen 60% + liukuva keskiarvo 40%)
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import ennuste
+
+METHODS = ("holt", "linear", "blend")
+
+
+# =============================================================================
+# VEKTOROIDUT MENETELMÄT
+# =============================================================================
+def holt_batch(matrix: np.ndarray, steps: int = 12, alpha: float = 0.3,
+               beta: float = 0.1, window: int = 36) -> np.ndarray:
+    """Holtin tasoitus kaikille riveille kerralla (vrt. predict_next_months)"""
+    recent = matrix[:, -min(window, matrix.shape[1]):]
+    level = recent[:, 0].copy()
+    trend = recent[:, 1] - recent[:, 0]
+    for t in range(recent.shape[1]):
+        last_level = level
+        level = alpha * recent[:, t] + (1 - alpha) * (level + trend)
+        trend = beta * (level - last_level) + (1 - beta) * trend
+    h = np.arange(1, steps + 1)
+    return level[:, None] + trend[:, None] * h
+
+
+def linear_batch(matrix: np.ndarray, steps: int = 6) -> np.ndarray:
+    """Lineaarinen trendi viimeisistä 12 arvosta (vrt. linear_forecast)"""
+    y = matrix[:, -12:]
+    n = y.shape[1]
+    x = np.arange(n)
+    xc = x - x.mean()
+    slope = ((y - y.mean(axis=1, keepdims=True)) @ xc) / (xc @ xc)
+    intercept = y.mean(axis=1) - slope * x.mean()
+    future_x = np.arange(n, n + steps)
+    return intercept[:, None] + slope[:, None] * future_x
+
+
+def moving_average_batch(matrix: np.ndarray, steps: int = 6, window: int = 3) -> np.ndarray:
+    """Liukuva keskiarvo trendillä (vrt. moving_average_forecast)"""
+    avg = matrix[:, -window:].mean(axis=1)
+    if matrix.shape[1] >= window * 2:
+        prev_avg = matrix[:, -window * 2:-window].mean(axis=1)
+        trend = (avg - prev_avg) / window
+    else:
+        trend = np.zeros_like(avg)
+    return avg[:, None] + trend[:, None] * np.arange(1, steps + 1)
+
+
+def blend_batch(matrix: np.ndarray, steps: int = 6) -> np.ndarray:
+    """Lineaarinen 60% + liukuva keskiarvo 40% (vrt. create_forecast)"""
+    return linear_batch(matrix, steps) * 0.6 + moving_average_batch(matrix, steps) * 0.4
+
+
+_BATCH_FUNCS = {
+    "holt": holt_batch,
+    "linear": linear_batch,
+    "blend": blend_batch,
+}
+
+
+def batch_by_length(matrix: np.ndarray, method: str, steps: int) -> np.ndarray:
+    """
+    Laske rivit ryhmittäin havaintojen määrän mukaan
+
+    Lyhyemmät sarjat on täytetty alusta NaN:illa; jokainen ryhmä lasketaan
+    omalla ikkunallaan, joten pitkän sarjan ennuste ei riipu lyhyistä.
+    """
+    counts = np.count_nonzero(~np.isnan(matrix), axis=1)
+    out = np.full((matrix.shape[0], steps), np.nan)
+    for count in np.unique(counts[counts > 0]):
+        rows = np.flatnonzero(counts == count)
+        out[rows] = _BATCH_FUNCS[method](matrix[rows, matrix.shape[1] - count:], steps)
+    return out
+
+
+# =============================================================================
+# JAETTU MUISTI
+# =============================================================================
+def share_array(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, tuple]:
+    """Kopioi taulukko jaettuun muistiin, palauta (shm, kuvaus)"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_array(spec: tuple) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Liity jaettuun taulukkoon työprosessissa kuvauksen perusteella"""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _forecast_chunk(in_spec: tuple, out_spec: tuple, start: int, stop: int,
+                    method: str, steps: int) -> int:
+    """Työprosessi: laske rivit start:stop ja kirjoita tulos jaettuun muistiin"""
+    shm_in, matrix = attach_array(in_spec)
+    shm_out, out = attach_array(out_spec)
+    try:
+        out[start:stop] = batch_by_length(matrix[start:stop], method, steps)
+    finally:
+        del matrix, out
+        shm_in.close()
+        shm_out.close()
+    return stop - start
+
+
+# =============================================================================
+# AJO
+# =============================================================================
+def forecast_matrix(matrix: np.ndarray, method: str = "blend", steps: int = 6,
+                    workers: Optional[int] = None,
+                    chunk_size: Optional[int] = None) -> np.ndarray:
+    """
+    Ennusta kaikki matriisin rivit valitulla menetelmällä
+
+    Args:
+        matrix: Sarjat riveittäin (n_sarjaa, n_ajankohtaa), lyhyet sarjat alusta NaN:illa
+        method: "holt", "linear" tai "blend"
+        steps: Ennustettavien jaksojen määrä
+        workers: Prosessien määrä (oletus: ytimien määrä, 1 = ei poolia)
+        chunk_size: Rivejä per tehtävä (oletus: ~4 tehtävää per prosessi)
+
+    Returns:
+        Ennusteet (n_sarjaa, steps)
+    """
+    if method not in _BATCH_FUNCS:
+        raise ValueError(f"Tuntematon menetelmä: {method} (valitse {', '.join(METHODS)})")
+
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    n_series = matrix.shape[0]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or n_series < 2 * workers:
+        return batch_by_length(matrix, method, steps)
+
+    chunk_size = chunk_size or -(-n_series // (workers * 4))
+    bounds = [(s, min(s + chunk_size, n_series)) for s in range(0, n_series, chunk_size)]
+
+    shm_in, in_spec = share_array(matrix)
+    shm_out, out_spec = share_array(np.empty((n_series, steps)))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_forecast_chunk, in_spec, out_spec, start, stop, method, steps)
+                       for start, stop in bounds]
+            for future in futures:
+                future.result()
+        return np.ndarray((n_series, steps), dtype=np.float64, buffer=shm_out.buf).copy()
+    finally:
+        for shm in (shm_in, shm_out):
+            shm.close()
+            shm.unlink()
+
+
+def series_matrix(data: dict, n_values: int = 36) -> Tuple[List[str], np.ndarray, List[str]]:
+    """
+    Muodosta yhdistetystä aineistosta sarjamatriisi ennustusta varten
+
+    Jokaisesta sarjasta otetaan viimeiset n_values havaintoa. Lyhyemmät
+    sarjat täytetään alusta NaN:illa, ja forecast_matrix laskee ne omalla
+    ikkunallaan. Sarjat voivat päättyä eri jaksoon, joten jokaisen rivin
+    viimeisin jakso palautetaan erikseen.
+
+    Returns:
+        names: Sarjojen nimet rivijärjestyksessä
+        matrix: (n_sarjaa, pisimmän sarjan pituus)
+        last_periods: Kunkin rivin viimeisin havaintojakso
+    """
+    latest = {k: v for k, v in ennuste.get_latest_values(data, n_months=n_values).items() if v}
+    names = list(latest.keys())
+    width = max(len(v) for v in latest.values())
+    matrix = np.full((len(names), width), np.nan)
+    for row, name in enumerate(names):
+        matrix[row, width - len(latest[name]):] = [val for _, val in latest[name]]
+    last_periods = [latest[name][-1][0] for name in names]
+    return names, matrix, last_periods
+
+
+def to_forecast_dict(names: List[str], forecasts: np.ndarray,
+                     last_periods: List[str]) -> Dict[str, Dict]:
+    """Muunna ennustematriisi ennuste.py:n muotoon {jakso: {sarja: arvo}}"""
+    result: Dict[str, Dict] = {}
+    for i, (name, last_period) in enumerate(zip(names, last_periods)):
+        periods = ennuste.generate_forecast_periods(last_period, forecasts.shape[1])
+        for j, period in enumerate(periods):
+            result.setdefault(period, {})[name] = round(float(forecasts[i, j]), 2)
+    return dict(sorted(result.items()))
+
+
+def main(method: str = "blend", months: int = 6):
+    print("=" * 50)
+    print(f"RINNAKKAISET ENNUSTEET ({method})")
+    print("=" * 50)
+
+    data = ennuste.load_data()
+    if not data:
+        return
+
+    names, matrix, last_periods = series_matrix(data)
+    forecasts = forecast_matrix(matrix, method=method, steps=months)
+    result = to_forecast_dict(names, forecasts, last_periods)
+    ennuste.print_forecast_summary(result)
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    main(*sys.argv[1:2])
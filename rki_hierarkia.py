@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Rakennuskustannusindeksin koko hierarkia - Kaikki osaindeksit kerralla
+=====================================================================
+Hakee taulukosta rki/statfin_rki_pxt_13g8.px kaikki panoslajien ja
+rakennustyyppien osaindeksit kaikilla julkaistuilla perusvuosilla.
+Luokitukset ja niiden koodit luetaan taulukon metatiedoista, kyselyt
+jaetaan aikapaloihin solukaton mukaan ja tulos kootaan yhdeksi
+NumPy-kuutioksi (luokitukset x kuukaudet), joka sopii suoraan
+rinnakkaisennuste.forecast_matrix-ajolle.
+
+Hierarkia päätellään koodeista: koodin vanhempi on pisin toinen koodi, joka
+on sen etuliite (esim. 1 -> 11 -> 111); muut kuuluvat kokonaisindeksin alle.
+Johdonmukaisuustarkistus vertaa kokonaisindeksejä osiinsa.
+"""
+
+import itertools
+import json
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+import pxweb
+from asuminen_rakentaminen import get_table_metadata
+from sarjarekisteri import MAX_CELLS
+
+TABLE = "rki/statfin_rki_pxt_13g8.px"
+OUTPUT_FILE = "rki_hierarkia.npz"
+
+# Ulottuvuudet, joita ei käsitellä hierarkioina
+TIME_DIM = "Kuukausi"
+BASE_DIM = "Perusvuosi"
+CONTENT_DIM = "Tiedot"
+
+# Kokonaisindeksin koodit eri luokituksissa
+TOTAL_CODES = ("SSS", "0", "00", "KOKO")
+
+
+def infer_parents(codes: List[str], texts: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+    """
+    Päättele luokituksen vanhempi-lapsi-suhteet koodeista
+
+    Vanhempi on pisin toinen koodi, joka on koodin aito etuliite. Koodit,
+    joilla ei ole etuliitevanhempaa, kuuluvat kokonaisindeksin alle.
+    """
+    texts = texts or codes
+    total = next((c for c, t in zip(codes, texts)
+                  if c in TOTAL_CODES or 'yhteensä' in t.lower() or 'kokonais' in t.lower()), None)
+    parents = {}
+    for code in codes:
+        if code == total:
+            parents[code] = None
+            continue
+        prefixes = [c for c in codes if c != code and c != total and code.startswith(c)]
+        parents[code] = max(prefixes, key=len) if prefixes else total
+    return parents
+
+
+class RkiCube:
+    """Osaindeksit NumPy-kuutiona: values[(luokitukset...), kuukausi]"""
+
+    def __init__(self, dims: List[str], codes: Dict[str, List[str]], periods: List[str],
+                 values: np.ndarray, labels: Optional[Dict[str, List[str]]] = None):
+        self.dims = dims
+        self.codes = codes
+        self.periods = periods
+        self.values = values
+        self.labels = labels or codes
+        self.parents = {
+            d: infer_parents(codes[d], self.labels.get(d))
+            for d in dims if d not in (BASE_DIM, CONTENT_DIM)
+        }
+
+    def __repr__(self):
+        shape = " x ".join(f"{d}={len(self.codes[d])}" for d in self.dims)
+        return f"RkiCube({shape} x {len(self.periods)} kk)"
+
+    def series(self, **fixed: str) -> np.ndarray:
+        index = tuple(self.codes[d].index(fixed[d]) if d in fixed else slice(None)
+                      for d in self.dims)
+        return self.values[index]
+
+    def matrix(self) -> Tuple[List[tuple], np.ndarray]:
+        """Kaikki sarjat riveinä: (koodituplet, (n_sarjaa, n_kk))"""
+        labels = list(itertools.product(*(self.codes[d] for d in self.dims)))
+        return labels, self.values.reshape(-1, len(self.periods))
+
+    def forecast_ready(self, window: int = 36) -> Tuple[List[tuple], np.ndarray]:
+        """Sarjat, joilla on täydet viimeiset window kuukautta (ennustusta varten)"""
+        labels, matrix = self.matrix()
+        tail = matrix[:, -window:]
+        keep = ~np.isnan(tail).any(axis=1)
+        return [l for l, k in zip(labels, keep) if k], tail[keep]
+
+    def children(self, dim: str) -> Dict[str, List[str]]:
+        result: Dict[str, List[str]] = {}
+        for code, parent in self.parents[dim].items():
+            if parent is not None:
+                result.setdefault(parent, []).append(code)
+        return result
+
+    def check_consistency(self, tolerance: float = 0.5) -> List[dict]:
+        """
+        Vertaa kokonaisindeksejä osiinsa
+
+        Kokonaisindeksi on osiensa painotettu keskiarvo, joten sen on oltava
+        osien minimin ja maksimin välissä. Lisäksi sovitetaan pienimmän
+        neliösumman painot ja raportoidaan sovitusvirhe (RMSE).
+        """
+        issues = []
+        for dim in self.parents:
+            axis = self.dims.index(dim)
+            cube = np.moveaxis(self.values, axis, 0)
+            cube = cube.reshape(cube.shape[0], -1, cube.shape[-1])  # (koodit, muut, kk)
+            others = [d for d in self.dims if d != dim]
+            combos = list(itertools.product(*(self.codes[d] for d in others)))
+
+            for parent, kids in self.children(dim).items():
+                p = cube[self.codes[dim].index(parent)]
+                c = cube[[self.codes[dim].index(k) for k in kids]]
+                with np.errstate(invalid='ignore'):
+                    low = np.nanmin(c, axis=0) - tolerance
+                    high = np.nanmax(c, axis=0) + tolerance
+                    outside = (p < low) | (p > high)
+                excess = np.where(outside, np.maximum(low - p, p - high), 0.0)
+
+                for i, combo in enumerate(combos):
+                    valid = ~np.isnan(p[i]) & ~np.isnan(c[:, i]).any(axis=0)
+                    if valid.sum() <= len(kids):
+                        continue
+                    weights, *_ = np.linalg.lstsq(c[:, i, valid].T, p[i, valid], rcond=None)
+                    rmse = float(np.sqrt(np.mean((c[:, i, valid].T @ weights - p[i, valid]) ** 2)))
+                    violations = int(outside[i].sum())
+                    if violations or rmse > tolerance:
+                        issues.append({
+                            "dim": dim, "parent": parent, "children": kids,
+                            "combo": dict(zip(others, combo)),
+                            "violations": violations,
+                            "max_excess": round(float(np.nanmax(excess[i])), 3),
+                            "fit_rmse": round(rmse, 3),
+                        })
+        return issues
+
+    def save(self, filename: str = OUTPUT_FILE):
+        meta = {"dims": self.dims, "codes": self.codes, "labels": self.labels,
+                "periods": self.periods}
+        np.savez_compressed(filename, values=self.values, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, filename: str = OUTPUT_FILE) -> "RkiCube":
+        stored = np.load(filename)
+        meta = json.loads(str(stored["meta"]))
+        return cls(meta["dims"], meta["codes"], meta["periods"], stored["values"], meta["labels"])
+
+
+def fetch_hierarchy(base_years: Optional[List[str]] = None,
+                    contents: Tuple[str, ...] = ("pisteluku",),
+                    max_cells: int = MAX_CELLS) -> Optional[RkiCube]:
+    """
+    Hae kaikki osaindeksit mahdollisimman harvoilla kyselyillä
+
+    Args:
+        base_years: Perusvuodet (oletus: kaikki julkaistut)
+        contents: Tiedot-ulottuvuuden koodit
+        max_cells: Solukatto per kysely
+    """
+    variables = get_table_metadata(TABLE)
+    if not variables:
+        print("    Virhe: metatietoja ei saatu")
+        return None
+
+    selection, labels, time_dim, time_values = {}, {}, None, []
+    for v in variables:
+        if v.get('time') or v['code'] == TIME_DIM:
+            time_dim, time_values = v['code'], v['values']
+            continue
+        values, texts = v['values'], v.get('valueTexts', v['values'])
+        if v['code'] == BASE_DIM and base_years:
+            values = [c for c in values if c in base_years]
+        elif v['code'] == CONTENT_DIM:
+            values = [c for c in values if c in contents]
+        selection[v['code']] = values
+        labels[v['code']] = [t for c, t in zip(v['values'], texts) if c in values]
+    if time_dim is None:
+        print(f"    Virhe: aikaulottuvuutta ({TIME_DIM}) ei löytynyt metatiedoista")
+        return None
+
+    per_period = int(np.prod([len(v) for v in selection.values()]))
+    chunk = max(max_cells // max(per_period, 1), 1)
+    chunks = [time_values[i:i + chunk] for i in range(0, len(time_values), chunk)]
+    print(f"  {per_period} sarjaa x {len(time_values)} kk, {len(chunks)} kyselyä")
+
+    dims, parts = None, []
+    for n, periods in enumerate(chunks, 1):
+        print(f"  [{n}/{len(chunks)}] {periods[0]}-{periods[-1]}")
+        query = {"query": [{"code": time_dim, "selection": {"filter": "item", "values": periods}}] +
+                          [{"code": d, "selection": {"filter": "item", "values": v}}
+                           for d, v in selection.items()]}
+        table = pxweb.fetch_table(TABLE, query)
+        if table is None:
+            return None
+        dims = [d for d in table.dims if d != time_dim]
+        # Aika viimeiseksi akseliksi
+        parts.append(np.moveaxis(table.values, table.dims.index(time_dim), -1))
+
+    codes = {d: table.codes[d] for d in dims}
+    label_map = {d: [dict(zip(selection[d], labels[d])).get(c, c) for c in codes[d]]
+                 for d in dims}
+    return RkiCube(dims, codes, list(time_values), np.concatenate(parts, axis=-1), label_map)
+
+
+def main():
+    print("=" * 60)
+    print("RAKENNUSKUSTANNUSINDEKSI - OSAINDEKSIEN HIERARKIA")
+    print("=" * 60)
+
+    cube = fetch_hierarchy()
+    if cube is None:
+        return
+    print(f"\n{cube}")
+    for dim, parents in cube.parents.items():
+        depth = {}
+        for code in parents:
+            d, p = 0, parents[code]
+            while p is not None:
+                d, p = d + 1, parents[p]
+            depth[code] = d
+        print(f"  {dim}: {len(parents)} koodia, syvyys {max(depth.values(), default=0)}")
+
+    issues = cube.check_consistency()
+    print(f"\nJohdonmukaisuustarkistus: {len(issues)} poikkeamaa")
+    for issue in issues[:10]:
+        print(f"  {issue['dim']} {issue['parent']} {issue['combo']}: "
+              f"{issue['violations']} kk rajojen ulkopuolella, RMSE {issue['fit_rmse']}")
+
+    cube.save()
+    labels, _ = cube.forecast_ready()
+    print(f"\nTallennettu: {OUTPUT_FILE} ({len(labels)} ennustettavaa sarjaa)")
+    return cube
+
+
+if __name__ == "__main__":
+    main()
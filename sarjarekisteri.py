@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Sarjarekisteri ja kyselysuunnittelija
+=====================================
+Jokainen aineiston sarja kuvataan deklaratiivisesti (taulukko, aikaulottuvuus,
+rajaukset, frekvenssi, perusvuosimuunnos). Suunnittelija yhdistää saman
+taulukon sarjat mahdollisimman harvoiksi kyselyiksi: kaksi sarjaa mahtuvat
+samaan kyselyyn, jos niiden rajaukset eroavat korkeintaan yhdessä
+ulottuvuudessa (esim. ContentCode tai rakennusluokitus), jolloin karteesinen
+tulo ei tuo ylimääräisiä soluja.
+
+Uuden sarjan lisääminen = uusi SeriesSpec-rivi SERIES-listaan.
+"""
+
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+import pxweb
+import hajautus
+from asuminen_rakentaminen import get_time_values
+
+# PxWebin solukatto yhdelle kyselylle
+MAX_CELLS = 100_000
+
+# Tauko kyselyjen välillä (rate limit protection)
+REQUEST_INTERVAL = 0.5
+
+
+@dataclass(frozen=True)
+class SeriesSpec:
+    """Yhden sarjan kuvaus"""
+    name: str
+    table: str
+    time_dim: str
+    start: str                      # Ensimmäinen jakso; kaikki myöhemmät haetaan
+    filters: Dict[str, str] = field(hash=False)
+    description: str = ""
+    frequency: str = "M"            # M, Q tai A - muunnetaan kuukausiksi
+    disaggregation: str = "denton"  # Q/A -> M: denton, spline tai porras (hajautus.py)
+    rebase: bool = False            # Normalisoi vuoden 2015 keskiarvo = 100
+    periods: Tuple[str, ...] = ()   # Täytetään suunnittelussa taulukon metatiedoista
+
+
+SERIES: List[SeriesSpec] = [
+    SeriesSpec(
+        name="rakennuskustannusindeksi",
+        table="rki/statfin_rki_pxt_13g8.px",
+        time_dim="Kuukausi",
+        start="2015M01",
+        filters={"Perusvuosi": "2015_100", "Tiedot": "pisteluku"},
+        description="Rakennuskustannusindeksin kokonaisindeksi (2015=100)",
+    ),
+    SeriesSpec(
+        name="vuokraindeksi",
+        table="asvu/statfin_asvu_pxt_11x4.px",
+        time_dim="Vuosineljännes",
+        start="2015Q1",
+        filters={"Alue": "ksu", "Huoneluku": "00", "Rahoitusmuoto": "0", "Tiedot": "ketj_Tor"},
+        description="Vuokraindeksi (2015=100)",
+        frequency="Q",
+    ),
+    SeriesSpec(
+        name="osakeasunnot_hinnat",
+        table="ashi/statfin_ashi_pxt_12fv.px",
+        time_dim="Vuosineljännes",
+        start="2015Q1",
+        filters={"Alue": "ksu", "Talotyyppi": "0", "Huoneluku": "00", "Tiedot": "ketjutettu_lv"},
+        description="Osakeasuntojen hintaindeksi (2015=100)",
+        frequency="Q",
+    ),
+    SeriesSpec(
+        name="kiinteisto_tontit_hinnat",
+        table="kihi/statfin_kihi_pxt_11jc.px",
+        time_dim="Vuosi",
+        start="2015",
+        filters={"Aluejako": "01", "Tiedot": "ketjutettu_lv"},
+        description="Omakotitalotonttien hintaindeksi (2015=100)",
+        frequency="A",
+    ),
+    SeriesSpec(
+        name="kiinteisto_yllapito",
+        table="kyki/statfin_kyki_pxt_14ry.px",
+        time_dim="Vuosineljännes",
+        start="2021Q1",
+        filters={"Rakennustyyppi": "0.", "Tiedot": "indeksipisteluku_kaksikatk"},
+        description="Kiinteiston yllapidon kustannusindeksi (muunnettu 2015=100, data 2021-)",
+        frequency="Q",
+        rebase=True,
+    ),
+    SeriesSpec(
+        name="rakennus_tuotanto",
+        table="raku/statfin_raku_pxt_156g.px",
+        time_dim="timeperiod",
+        start="2015M01",
+        filters={"rakennusluokitus2018": "SSS", "ContentCode": "urvi2020"},
+        description="Uudisrakentamisen volyymi-indeksi (muunnettu 2015=100)",
+        rebase=True,
+    ),
+    SeriesSpec(
+        name="rakennusluvat",
+        table="raku/statfin_raku_pxt_156f.px",
+        time_dim="timeperiod",
+        start="2015M01",
+        filters={"rakennusvaihe": "1", "alue": "SSS", "rakennusluokitus2018": "SSS",
+                 "ContentCode": "tilavuusToimenpide_lvs"},
+        description="Myönnetyt rakennusluvat, tilavuus m3 liukuva vuosisumma (indeksi 2015=100)",
+        rebase=True,
+    ),
+]
+
+
+def get_spec(name: str) -> SeriesSpec:
+    for spec in SERIES:
+        if spec.name == name:
+            return spec
+    raise KeyError(f"Tuntematon sarja: {name}")
+
+
+def provisional_months(name: str) -> int:
+    """Sarjan lopun kuukaudet, jotka hajautus voi vielä revisoida (0 kuukausisarjoille)"""
+    spec = next((s for s in SERIES if s.name == name), None)
+    return 0 if spec is None else hajautus.provisional_months(spec.frequency, spec.disaggregation)
+
+
+# =============================================================================
+# SUUNNITTELU
+# =============================================================================
+@dataclass
+class PlannedQuery:
+    """Yksi PxWeb-kysely, joka palvelee yhtä tai useampaa sarjaa"""
+    table: str
+    time_dim: str
+    periods: List[str]
+    filters: Dict[str, List[str]]
+    series: List[SeriesSpec]
+    merge_dim: Optional[str] = None
+
+    @property
+    def cells(self) -> int:
+        n = len(self.periods)
+        for values in self.filters.values():
+            n *= len(values)
+        return n
+
+    def accepts(self, spec: SeriesSpec) -> Optional[str]:
+        """Palauta ulottuvuus, jossa sarja eroaa (tai ""), None jos ei sovi"""
+        if spec.table != self.table or spec.time_dim != self.time_dim:
+            return None
+        if spec.filters.keys() != self.filters.keys():
+            return None
+        differing = [d for d, code in spec.filters.items() if code not in self.filters[d]]
+        if not differing:
+            return ""
+        if len(differing) > 1 or (self.merge_dim and self.merge_dim != differing[0]):
+            return None
+        # Yhdistettävän ulottuvuuden ulkopuolella rajausten on oltava yksikäsitteisiä
+        if any(len(v) > 1 for d, v in self.filters.items() if d != differing[0]):
+            return None
+        return differing[0]
+
+    def add(self, spec: SeriesSpec, dim: str):
+        if dim:
+            self.filters[dim].append(spec.filters[dim])
+            self.merge_dim = dim
+        known = set(self.periods)
+        self.periods.extend(p for p in spec.periods if p not in known)
+        self.series.append(spec)
+
+    def to_query(self, periods: List[str]) -> dict:
+        query = [{"code": self.time_dim, "selection": {"filter": "item", "values": periods}}]
+        query += [{"code": d, "selection": {"filter": "item", "values": v}}
+                  for d, v in self.filters.items()]
+        return {"query": query, "response": {"format": "json-stat2"}}
+
+    def chunks(self, max_cells: int = MAX_CELLS) -> List[List[str]]:
+        """Jaa aikapisteet paloihin, jotta solukatto ei ylity"""
+        per_period = max(self.cells // max(len(self.periods), 1), 1)
+        size = max(max_cells // per_period, 1)
+        return [self.periods[i:i + size] for i in range(0, len(self.periods), size)]
+
+
+def plan_queries(specs: List[SeriesSpec]) -> List[PlannedQuery]:
+    """
+    Yhdistä sarjat mahdollisimman harvoiksi kyselyiksi taulukoittain
+
+    Sarjan ajat ovat kaikki taulukon metatietojen jaksot alkujaksosta
+    eteenpäin, joten uusi julkaisu tulee mukaan ilman rekisterin muutoksia.
+    Jos metatietoja ei saada, sarja jätetään pois ja haetaan seuraavalla kerralla.
+    """
+    available: Dict[Tuple[str, str], List[str]] = {}
+    planned: List[PlannedQuery] = []
+    for spec in specs:
+        key = (spec.table, spec.time_dim)
+        if key not in available:
+            available[key] = get_time_values(spec.table, spec.time_dim)
+        periods = [p for p in available[key] if p >= spec.start]
+        if not periods:
+            print(f"  Ohitetaan {spec.name}: ei aikoja taulukossa {spec.table}")
+            continue
+        spec = replace(spec, periods=tuple(periods))
+
+        for query in planned:
+            dim = query.accepts(spec)
+            if dim is not None:
+                query.add(spec, dim)
+                break
+        else:
+            planned.append(PlannedQuery(
+                table=spec.table, time_dim=spec.time_dim, periods=periods,
+                filters={d: [c] for d, c in spec.filters.items()}, series=[spec],
+            ))
+    return planned
+
+
+# =============================================================================
+# SUORITUS
+# =============================================================================
+def _to_monthly(specs: List[SeriesSpec], raw: Dict[str, dict]) -> Dict[str, dict]:
+    """Hajauta neljännes- ja vuosisarjat kuukausiksi, yksi ratkaisu per (frekvenssi, menetelmä)"""
+    monthly = {spec.name: raw[spec.name] for spec in specs if spec.frequency == "M"}
+    groups: Dict[Tuple[str, str], List[str]] = {}
+    for spec in specs:
+        if spec.frequency != "M":
+            groups.setdefault((spec.frequency, spec.disaggregation), []).append(spec.name)
+    for (frequency, method), names in groups.items():
+        monthly.update(hajautus.to_monthly({n: raw[n] for n in names}, frequency, method))
+    return monthly
+
+
+def _rebase(values: dict, year: int = 2015) -> dict:
+    """Normalisoi sarja niin, että vuoden keskiarvo = 100 (jos vuosi löytyy)"""
+    year_values = [v for k, v in values.items() if k.startswith(str(year))]
+    if not year_values:
+        return values
+    avg = sum(year_values) / len(year_values)
+    if avg <= 0:
+        return values
+    return {k: (v / avg) * 100 for k, v in values.items()}
+
+
+def execute_plan(planned: List[PlannedQuery]) -> Dict[str, dict]:
+    """Suorita suunnitellut kyselyt, palauta {sarja: {kuukausi: arvo}}"""
+    raw_results: Dict[str, dict] = {}
+    n_requests = sum(len(q.chunks()) for q in planned)
+    request_no = 0
+    for query in planned:
+        raw = {spec.name: {} for spec in query.series}
+        for periods in query.chunks():
+            request_no += 1
+            names = ", ".join(s.name for s in query.series)
+            print(f"  [{request_no}/{n_requests}] {query.table}: {names}")
+            table = pxweb.fetch_table(query.table, query.to_query(periods))
+            if table is not None:
+                table.time_dim = query.time_dim
+                for spec in query.series:
+                    raw[spec.name].update(table.to_series(**spec.filters))
+            if request_no < n_requests:
+                time.sleep(REQUEST_INTERVAL)
+
+        for spec in query.series:
+            wanted = set(spec.periods)
+            raw_results[spec.name] = {p: v for p, v in raw[spec.name].items() if p in wanted}
+
+    specs = [spec for query in planned for spec in query.series]
+    monthly = _to_monthly(specs, raw_results)
+    return {spec.name: _rebase(monthly[spec.name]) if spec.rebase else monthly[spec.name]
+            for spec in specs}
+
+
+def fetch_series(names: Optional[List[str]] = None) -> Dict[str, dict]:
+    """Hae rekisterin sarjat (oletuksena kaikki) rekisterin järjestyksessä"""
+    specs = SERIES if names is None else [get_spec(n) for n in names]
+    results = execute_plan(plan_queries(specs))
+    return {spec.name: results.get(spec.name, {}) for spec in specs}
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Päivitysseuranta - Pitkäkestoinen prosessi StatFin-julkaisujen seurantaan
+========================================================================
+Korvaa cron-ajot: prosessi pysyy lämpimänä (yhteinen HTTP-istunto,
+aineisto muistissa) ja kyselee taulukoiden päivitysaikoja kevyillä
+kansiolistauksilla. Kun taulukko päivittyy, haetaan vain sen sarjat,
+yhdistetään ne aineistoon ja ennustetaan ne uudelleen.
+
+Käyttö:
+    python seuranta.py [kyselyväli_sekunteina]
+"""
+
+import json
+import sys
+import time
+from typing import Dict, List
+
+import ennuste
+from asuminen_rakentaminen import export_to_json, get_tables_updated, merge_series
+from sarjarekisteri import SERIES, fetch_series
+
+# Kyselyväli - uusi julkaisu näkyy viimeistään tämän ajan kuluttua
+POLL_INTERVAL = 30
+
+STATE_FILE = ".seuranta_tila.json"
+DATA_FILE = "asuminen_rakentaminen.json"
+FORECAST_FILE = "ennusteet.json"
+
+
+class RefreshDaemon:
+    """Seuraa taulukoiden päivitysaikoja ja päivittää muuttuneet sarjat"""
+
+    def __init__(self, data_file: str = DATA_FILE, forecast_file: str = FORECAST_FILE,
+                 state_file: str = STATE_FILE):
+        self.data_file = data_file
+        self.forecast_file = forecast_file
+        self.state_file = state_file
+        self.tables: Dict[str, List[str]] = {}
+        for spec in SERIES:
+            self.tables.setdefault(spec.table, []).append(spec.name)
+        self.stamps = self._load_json(state_file).get("updated", {})
+        self.series = self._load_series()
+
+    @staticmethod
+    def _load_json(filename: str) -> dict:
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _load_series(self) -> Dict[str, dict]:
+        """Pura tallennettu aineisto takaisin sarjoiksi {sarja: {jakso: arvo}}"""
+        merged = self._load_json(self.data_file).get('merged_data', {})
+        series = {spec.name: {} for spec in SERIES}
+        for period, row in merged.items():
+            for name, value in row.items():
+                if value is not None and name in series:
+                    series[name][period] = value
+        if not any(series.values()):
+            # Ei tallennettua aineistoa - haetaan kaikki ensimmäisellä kierroksella
+            self.stamps = {}
+        return series
+
+    def changed_tables(self) -> Dict[str, str]:
+        """Taulukot, joiden päivitysaika poikkeaa tunnetusta"""
+        updated = get_tables_updated(list(self.tables))
+        return {t: stamp for t, stamp in updated.items() if self.stamps.get(t) != stamp}
+
+    def refresh(self, tables: Dict[str, str]) -> List[str]:
+        """Hae muuttuneiden taulukoiden sarjat, yhdistä ja ennusta ne"""
+        names = [name for table in tables for name in self.tables[table]]
+        fetched = fetch_series(names)
+        refreshed = [name for name, values in fetched.items() if values]
+        for name in refreshed:
+            self.series[name] = fetched[name]
+
+        # Epäonnistunut haku (tyhjä sarja) jätetään kirjaamatta, jotta se yritetään uudelleen
+        failed = [t for t in tables if not all(fetched.get(n) for n in self.tables[t])]
+        if failed:
+            print(f"    Haku epäonnistui, yritetään uudelleen: {', '.join(failed)}")
+        if refreshed:
+            merged = merge_series(self.series)
+            data = export_to_json(merged, self.series, self.data_file)
+            self._update_forecasts(data, refreshed)
+
+        self.stamps.update({t: stamp for t, stamp in tables.items() if t not in failed})
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump({"updated": self.stamps}, f, indent=2)
+        return refreshed
+
+    def _update_forecasts(self, data: dict, names: List[str]):
+        """Ennusta vain päivitetyt sarjat ja yhdistä aiempiin ennusteisiin"""
+        if not names:
+            return
+        existing = self._load_json(self.forecast_file).get('forecasts', {})
+        # Päivitettyjen sarjojen vanhat ennusteet pois (osa kuukausista on nyt havaittuja)
+        for period in list(existing):
+            for name in names:
+                existing[period].pop(name, None)
+            if not existing[period]:
+                del existing[period]
+        for period, values in ennuste.create_forecast(data, months=6, series=names).items():
+            existing.setdefault(period, {}).update(values)
+        ennuste.export_forecast_json(existing, data, self.forecast_file)
+
+    def poll_once(self) -> List[str]:
+        tables = self.changed_tables()
+        if not tables:
+            return []
+        print(f"[{time.strftime('%H:%M:%S')}] Päivittyneet taulukot: {', '.join(tables)}")
+        return self.refresh(tables)
+
+    def run(self, interval: float = POLL_INTERVAL):
+        print(f"Seurataan {len(self.tables)} taulukkoa, kyselyväli {interval}s")
+        while True:
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"    Virhe: {e}")
+            time.sleep(max(interval - (time.monotonic() - started), 0))
+
+
+def main():
+    print("=" * 60)
+    print("PÄIVITYSSEURANTA - Tilastokeskus")
+    print("=" * 60)
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else POLL_INTERVAL
+    try:
+        RefreshDaemon().run(interval)
+    except KeyboardInterrupt:
+        print("\nLopetetaan.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Testit - Yhdistetty aineisto ja ikkunakyselyt (ei verkkoyhteyttä)
+"""
+
+import numpy as np
+import pytest
+
+from aineisto import AggregateIndex, MergedData, period_months, shift_period
+
+# 2024 kokonaan ja 2025M01; b puuttuu 2024M03
+MONTHS = [f"2024M{m:02d}" for m in range(1, 13)] + ["2025M01"]
+
+
+@pytest.fixture
+def index() -> AggregateIndex:
+    a = np.arange(100.0, 113.0)
+    b = np.arange(200.0, 213.0)
+    b[2] = np.nan
+    return AggregateIndex(MergedData(MONTHS, ["a", "b"], np.column_stack([a, b])))
+
+
+def test_merged_data_roundtrip():
+    merged = MergedData.from_series({"a": {"2024M02": 2.0, "2024M01": 1.0}, "b": {"2024M02": 5.0}})
+    assert merged.periods == ["2024M01", "2024M02"]
+    assert merged.to_dict() == {"2024M01": {"a": 1.0, "b": None}, "2024M02": {"a": 2.0, "b": 5.0}}
+    assert MergedData.from_dict(merged.to_dict()).series("b") == {"2024M02": 5.0}
+
+
+def test_period_helpers():
+    assert len(period_months("2024Q2")) == 3 and len(period_months("2024")) == 12
+    assert shift_period("2024Q1", -1) == "2023Q4"
+    assert shift_period("2024M12", 1) == "2025M01"
+
+
+def test_window_sum_and_mean(index):
+    assert index.sum("2024Q1", series="a") == 303.0
+    assert index.mean("2024", series="a") == pytest.approx(105.5)
+    assert index.count("2024Q1", series="b") == 2
+
+
+def test_incomplete_window_is_nan(index):
+    # Kesken oleva vuosi ja puuttuva kuukausi
+    assert np.isnan(index.mean("2025", series="a"))
+    assert np.isnan(index.mean("2024Q1", series="b"))
+    assert index.mean("2024Q1", series="b", complete=False) == pytest.approx(200.5)
+    assert index.coverage("2025", series="a") == pytest.approx(1 / 12)
+
+
+def test_rolling_sum_requires_full_window(index):
+    assert np.isnan(index.rolling_sum("2024M06", series="a"))
+    assert index.rolling_sum("2024M12", series="a") == pytest.approx(sum(range(100, 112)))
+    assert index.rolling_sum("2025M01", months=3, series="a") == pytest.approx(333.0)
+
+
+def test_change_compares_complete_periods(index):
+    assert np.isnan(index.yoy("2025", series="a"))
+    assert index.yoy("2025M01", series="a") == pytest.approx(12.0)
+    assert index.change("2024Q2", series="a") == pytest.approx((104 / 101 - 1) * 100)
+    # Vektoroitu kaikkien sarjojen yli: b:n Q1 on vajaa
+    changes = index.change("2024Q2")
+    assert not np.isnan(changes[0]) and np.isnan(changes[1])
+
+
+def test_latest(index):
+    assert index.latest(series="a") == 112.0
+    assert index.latest("2024M03", series="b") == 201.0
+    assert np.isnan(index.latest("2023M12")).all()
+    assert index.latest_month_in("2025Q1") == "2025M01"
+    assert index.last_period("Q") == "2025Q1"
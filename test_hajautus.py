@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Testit - Ajallinen hajautus kuukausiksi (ei verkkoyhteyttä)
+"""
+
+import numpy as np
+import pytest
+
+from hajautus import LOOKAHEAD, disaggregate, provisional_months, to_monthly
+
+
+def _quarters(n_series: int = 5, n_low: int = 30, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 + rng.standard_normal((n_series, n_low)).cumsum(axis=1)
+
+
+@pytest.mark.parametrize("method", ["denton", "spline", "porras"])
+def test_disaggregate_preserves_period_means(method):
+    low = _quarters()
+    high = disaggregate(low, 3, method)
+    assert high.shape == (5, 90)
+    np.testing.assert_allclose(high.reshape(5, 30, 3).mean(axis=2), low, atol=1e-9)
+
+
+def test_disaggregate_sum_aggregation():
+    low = _quarters(n_low=12)
+    high = disaggregate(low, 12, "denton", aggregation="sum")
+    np.testing.assert_allclose(high.reshape(5, 12, 12).sum(axis=2), low, atol=1e-9)
+
+
+def test_missing_periods_stay_missing():
+    low = _quarters(n_series=2, n_low=10)
+    low[0, 4] = np.nan
+    low[1, :2] = np.nan
+    high = disaggregate(low, 3, "denton")
+    assert np.isnan(high[0, 12:15]).all() and np.isnan(high[1, :6]).all()
+    assert not np.isnan(high[0, :12]).any() and not np.isnan(high[0, 15:]).any()
+    # Pätkät ratkaistaan erikseen, jaksojen keskiarvot säilyvät molemmin puolin aukkoa
+    means = high.reshape(2, 10, 3).mean(axis=2)
+    np.testing.assert_allclose(means[~np.isnan(low)], low[~np.isnan(low)], atol=1e-9)
+
+
+@pytest.mark.parametrize("method", ["denton", "spline"])
+def test_new_period_revises_only_provisional_months(method):
+    low = _quarters(n_series=3, n_low=40)
+    provisional = provisional_months("Q", method)
+    assert provisional == LOOKAHEAD * 3
+    for n in range(2, 40):
+        before = disaggregate(low[:, :n], 3, method)
+        after = disaggregate(low[:, :n + 1], 3, method)
+        final = n * 3 - provisional
+        np.testing.assert_allclose(after[:, :final], before[:, :final], rtol=0, atol=1e-9)
+
+
+def test_provisional_months_monthly_and_step():
+    assert provisional_months("M") == 0
+    assert provisional_months("Q", "porras") == 0
+    assert provisional_months("A") == LOOKAHEAD * 12
+
+
+def test_to_monthly_labels():
+    result = to_monthly({"a": {"2024Q1": 100.0, "2024Q2": 103.0}, "b": {"2024Q2": 50.0}}, "Q")
+    assert list(result["a"]) == [f"2024M{m:02d}" for m in range(1, 7)]
+    assert list(result["b"]) == ["2024M04", "2024M05", "2024M06"]
+    assert np.mean(list(result["a"].values())[3:]) == pytest.approx(103.0)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Testit - Tilallinen Holt-ennuste (ei verkkoyhteyttä)
+"""
+
+import numpy as np
+import pytest
+
+from hajautus import provisional_months, to_monthly
+from holt_tila import HoltState, HoltStateStore
+
+
+def _observations(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    values = 100 + rng.standard_normal(n).cumsum()
+    return [(f"{2015 + i // 12}M{i % 12 + 1:02d}", float(v)) for i, v in enumerate(values)]
+
+
+def _quarterly_release(n_quarters: int, seed: int = 0):
+    """Neljännessarjan julkaisu kuukausiksi hajautettuna"""
+    rng = np.random.default_rng(seed)
+    values = 100 + rng.standard_normal(40).cumsum()
+    quarters = {f"{2015 + q // 4}Q{q % 4 + 1}": float(values[q]) for q in range(n_quarters)}
+    return list(to_monthly({"s": quarters}, "Q")["s"].items())
+
+
+def _assert_same_state(a: HoltState, b: HoltState):
+    assert a.last_period == b.last_period and a.n == b.n
+    assert a.level == pytest.approx(b.level) and a.trend == pytest.approx(b.trend)
+    assert a.error_std == pytest.approx(b.error_std)
+
+
+def test_new_month_is_one_step(tmp_path):
+    filename = str(tmp_path / "holt_tila.json")
+    observations = _observations(40)
+    store = HoltStateStore(filename)
+    assert store.update("s", observations[:30]) == "uusi"
+    store.save()
+
+    store = HoltStateStore(filename)
+    assert store.update("s", observations[:30]) == "ennallaan"
+    assert store.update("s", observations[18:31]) == "päivitetty"
+    _assert_same_state(store.states["s"], HoltState.fit(observations[:31]))
+
+
+def test_revised_value_refits(tmp_path):
+    observations = _observations(30)
+    store = HoltStateStore(str(tmp_path / "holt_tila.json"))
+    store.update("s", observations[:29])
+    revised = observations[:25] + [(observations[25][0], observations[25][1] + 1.0)] + observations[26:]
+    assert store.update("s", revised) == "revisio"
+    _assert_same_state(store.states["s"], HoltState.fit(revised))
+
+
+def test_new_quarter_updates_without_refit(tmp_path):
+    provisional = provisional_months("Q")
+    store = HoltStateStore(str(tmp_path / "holt_tila.json"))
+    assert store.update("s", _quarterly_release(20), provisional) == "uusi"
+    for n_quarters in range(21, 30):
+        release = _quarterly_release(n_quarters)
+        # Hajautus revisoi edellisen neljänneksen kuukaudet, mutta ne olivat alustavia
+        assert store.update("s", release, provisional) == "päivitetty"
+        _assert_same_state(store.current["s"], HoltState.fit(release))
+        assert store.states["s"].last_period == release[-provisional - 1][0]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Testit - PxWeb-vastausten dekoodaus (ei verkkoyhteyttä)
+"""
+
+import numpy as np
+import pytest
+
+from pxweb import decode_csv, decode_json_stat2, decode_values
+
+# Koodisarakkeet näyttävät luvuilta: vuosi ja aluekoodi
+CSV_NUMERIC_CODES = (
+    '\ufeff"Vuosi","Alue","Omakotitalotontit ketjutettu indeksi"\n'
+    '"2015","01",100.0\n'
+    '"2016","01",..\n'
+    '"2015","02",98.5\n'
+)
+
+
+def test_decode_values_missing_markers():
+    values = decode_values(["1.5", ".", "..", "", "-2"])
+    assert values[0] == 1.5 and values[4] == -2
+    assert np.isnan(values[1:4]).all()
+
+
+def test_decode_csv_numeric_codes_with_dim_names():
+    labels, columns, values = decode_csv(CSV_NUMERIC_CODES, dim_names=["Vuosi", "Alue", "Tiedot"])
+    assert labels == [("2015", "01"), ("2016", "01"), ("2015", "02")]
+    assert columns == ["Omakotitalotontit ketjutettu indeksi"]
+    assert values.shape == (3, 1)
+    assert values[0, 0] == 100.0 and np.isnan(values[1, 0]) and values[2, 0] == 98.5
+
+
+def test_decode_csv_numeric_codes_with_n_label_cols():
+    labels, columns, values = decode_csv(CSV_NUMERIC_CODES, n_label_cols=2)
+    assert labels[2] == ("2015", "02")
+    assert values[:, 0].tolist()[::2] == [100.0, 98.5]
+
+
+def test_decode_csv_requires_label_columns():
+    with pytest.raises(ValueError):
+        decode_csv(CSV_NUMERIC_CODES)
+
+
+def test_decode_csv_several_value_columns():
+    text = '"Alue","2024Q1 Indeksi","2024Q2 Indeksi"\n"091",101.2,102.0\n"049",.,99.1\n'
+    labels, columns, values = decode_csv(text, dim_names=["Alue", "Vuosineljännes"])
+    assert labels == [("091",), ("049",)]
+    assert columns == ["2024Q1 Indeksi", "2024Q2 Indeksi"]
+    assert np.isnan(values[1, 0]) and values[1, 1] == 99.1
+
+
+def test_decode_csv_header_only():
+    labels, columns, values = decode_csv('"Vuosi","Indeksi"\n', dim_names=["Vuosi"])
+    assert labels == [] and columns == ["Indeksi"] and values.shape == (0, 1)
+
+
+def test_decode_json_stat2_dense_and_sparse():
+    payload = {
+        "id": ["Vuosi", "Alue"], "size": [2, 2],
+        "dimension": {
+            "Vuosi": {"category": {"index": {"2015": 0, "2016": 1}}},
+            "Alue": {"category": {"index": ["01", "02"], "label": {"01": "Koko maa", "02": "Uusimaa"}}},
+        },
+        "role": {"time": ["Vuosi"]},
+        "value": [100.0, None, 101.0, 99.0],
+    }
+    table = decode_json_stat2(payload)
+    assert table.time_dim == "Vuosi"
+    assert table.labels["Alue"] == ["Koko maa", "Uusimaa"]
+    assert table.to_series(Alue="02") == {"2016": 99.0}
+
+    sparse = decode_json_stat2(dict(payload, value={"0": 100.0, "3": 99.0}))
+    assert sparse.to_series(Alue="01") == {"2015": 100.0}